@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+from tempfile import mkdtemp
+from shutil import rmtree
+from contextlib import contextmanager
+from typing import Callable, List, Tuple, Any, Optional
+
+import toml
+
+from pypers import Directory, cache, getarg
+
+
+def noop():
+    """Task that does nothing."""
+
+
+def getint(key: str, default: int) -> int:
+    """Get an integer benchmark parameter from sys.argv (e.g. --nevents=16)."""
+    val = getarg(key)
+    return int(val) if val is not None else default
+
+
+@contextmanager
+def workdir(config: Optional[dict] = None):
+    """Run in a temporary job directory with its own config.toml, using the local cluster backend."""
+    from pypers.core.runtime import executor, console, status, trace
+    from pypers.core.workflow.node import relayout
+
+    cwd = os.getcwd()
+    tmp = mkdtemp(prefix='pypers_bench_')
+
+    job = {'name': 'bench', 'cluster': 'local', 'nnodes': 1, 'bundle_window': 0.01}
+    job.update((config or {}).get('job', {}))
+
+    with open(os.path.join(tmp, 'config.toml'), 'w') as f:
+        toml.dump({**(config or {}), 'job': job}, f)
+
+    # make pypers and benchmarks importable from MPI processes started in the temporary directory
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pythonpath = os.environ.get('PYTHONPATH')
+    os.environ['PYTHONPATH'] = root + (os.pathsep + pythonpath if pythonpath else '')
+    os.chdir(tmp)
+    relayout()
+
+    try:
+        yield Directory()
+
+    finally:
+        os.chdir(cwd)
+        relayout()
+        rmtree(tmp)
+
+        if pythonpath is None:
+            del os.environ['PYTHONPATH']
+
+        else:
+            os.environ['PYTHONPATH'] = pythonpath
+
+        # reset global state so that the next benchmark starts clean
+        cache.clear()
+        executor.reset()
+        console.reset()
+        status.reset()
+        trace.reset()
+
+
+@contextmanager
+def quiet():
+    """Discard console output (including output written by the console module directly)."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+    try:
+        yield
+
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def timeit(func: Callable[[], Any], repeat: int = 5) -> Tuple[float, float]:
+    """Best and mean wall time of a function in seconds."""
+    times = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        times.append(perf_counter() - start)
+
+    return min(times), sum(times) / len(times)
+
+
+def peak_memory(func: Callable[[], Any]) -> Tuple[Any, int]:
+    """Return value and peak traced memory (in bytes) of a function."""
+    tracemalloc.start()
+
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+
+    finally:
+        tracemalloc.stop()
+
+
+def report(title: str, rows: List[Tuple[str, str]]):
+    """Print benchmark results as an aligned table."""
+    print(f'\n{title}')
+    width = max(len(row[0]) for row in rows)
+
+    for name, val in rows:
+        print(f'  {name:{width}}  {val}')
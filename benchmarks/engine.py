@@ -0,0 +1,236 @@
+# Overhead of the workflow engine: node tree, checkpoints, paths, MPI dispatch and console
+# python -m benchmarks.engine [--nevents=32] [--niters=3] [--ntasks=2000] [--nmpi=16]
+import asyncio
+import pickle
+from time import time, perf_counter
+from functools import partial
+
+from pypers import Workspace, Task, basedir as d
+from pypers.core.runtime import console, executor, status
+
+from .common import noop, getint, workdir, quiet, timeit, peak_memory, report
+
+
+def _count(node) -> int:
+    """Number of tasks in a node tree."""
+    if isinstance(node, Task):
+        return 1
+
+    return sum(_count(child) for child in node)
+
+
+def _walk(node):
+    """Nodes of a node tree in depth-first order."""
+    yield node
+
+    if not isinstance(node, Task):
+        for child in node:
+            yield from _walk(child)
+
+
+def build(nevents: int, niters: int, ntasks: int) -> Workspace:
+    """Synthetic workflow shaped like an inversion: iterations with per-event concurrent solvers,
+        kernel summation and line search, plus a concurrent workspace of no-op tasks."""
+    ws = Workspace()
+
+    for i in range(niters):
+        ws.add(it := Workspace(f'iter_{i:02d}'))
+        it.add(kl := Workspace('kernel', concurrent=True))
+
+        for e in range(nevents):
+            kl.add(solver := Workspace(f'solver_{e:04d}', {'path_event': f'events/{e}'}))
+
+            for name in ('setup', 'mesher', 'solver', 'process_traces', 'misfit', 'adjoint'):
+                solver.add(noop, name)
+
+        it.add(noop, 'sum_kernels')
+        it.add(search := Workspace('search'))
+
+        for s in range(3):
+            search.add(step := Workspace(f'step_{s:02d}', concurrent=True))
+
+            for e in range(nevents):
+                step.add(noop, f'misfit_{e:04d}')
+
+    ws.add(idle := Workspace('noop', concurrent=True))
+
+    for j in range(ntasks):
+        idle.add(noop, f'task_{j:05d}')
+
+    return ws
+
+
+def bench_tree(nevents: int, niters: int, ntasks: int):
+    """Build time, memory footprint and pickle size of the node tree."""
+    with workdir():
+        best, _ = timeit(lambda: build(nevents, niters, ntasks))
+        ws, mem = peak_memory(lambda: build(nevents, niters, ntasks))
+        ntotal = _count(ws)
+        size = len(pickle.dumps(ws))
+
+        report('node tree', [
+            ('tasks', str(ntotal)),
+            ('build', f'{best * 1e3:.1f}ms ({best / ntotal * 1e6:.2f}us per task)'),
+            ('memory', f'{mem / 2**20:.2f}MB ({mem / ntotal:.0f}B per task)'),
+            ('pickle', f'{size / 2**20:.2f}MB ({size / ntotal:.0f}B per task)')
+        ])
+
+
+def bench_checkpoint(nevents: int, niters: int, ntasks: int):
+    """Cost of saving and loading job.pickle and job.status.json."""
+    with workdir():
+        ws = build(nevents, niters, ntasks)
+
+        with quiet():
+            ws._focus()
+
+        dump, _ = timeit(lambda: d.dump(ws, 'job.pickle'))
+        load, _ = timeit(lambda: d.load('job.pickle'))
+        snap, _ = timeit(lambda: (status.reset(), status.write(ws)))
+
+        # a task transition followed by a status write
+        task = next(node for node in _walk(ws) if isinstance(node, Task))
+
+        def transition():
+            task.reset()
+            status.write(ws)
+
+        update, _ = timeit(transition)
+
+        report('checkpoint', [
+            ('dump job.pickle', f'{dump * 1e3:.1f}ms'),
+            ('load job.pickle', f'{load * 1e3:.1f}ms'),
+            ('write status', f'{snap * 1e3:.1f}ms (rebuilt), {update * 1e3:.1f}ms (after a task transition)')
+        ])
+
+
+def bench_paths(ncalls: int):
+    """Path and level lookup of a task nested like optimizer / iteration / search / step / kernel / solver."""
+    with workdir():
+        ws = node = Workspace()
+
+        for name in ('optimizer', 'iter_00', 'search', 'step_00', 'kernel', 'solver_0000'):
+            node.add(child := Workspace(name))
+            node = child
+        
+        node.add(task := Task(noop, 'solver'))
+
+        def lookup():
+            for _ in range(ncalls):
+                node.rel('DATA/Par_file')
+                node.abs('OUTPUT_FILES')
+                task.level
+
+        best, _ = timeit(lookup)
+
+        report('paths', [('rel + abs + level', f'{best / ncalls * 1e6:.2f}us per call (depth {task.level})')])
+
+
+def bench_execute(nevents: int, niters: int, ntasks: int):
+    """End-to-end engine overhead per task (tasks do nothing)."""
+    with workdir():
+        ws = build(nevents, niters, ntasks)
+        ntotal = _count(ws)
+
+        with quiet():
+            start = perf_counter()
+            ws.run()
+            elapsed = perf_counter() - start
+
+        report('execution', [
+            ('tasks', str(ntotal)),
+            ('total', f'{elapsed:.2f}s'),
+            ('per task', f'{elapsed / ntotal * 1e3:.3f}ms')
+        ])
+
+
+def bench_dispatch(nreqs: int):
+    """Latency of placing and releasing MPI requests on a Summit-sized node pool."""
+    nnodes = 64
+    rows = []
+
+    with workdir({'job': {'nnodes': nnodes, 'cpus_per_node': 42, 'gpus_per_node': 6}}):
+        executor._init_nodes()
+
+        # solver-like GPU tasks mixed with CPU-only processing tasks
+        reqs = []
+
+        for i in range(nreqs):
+            if i % 2:
+                reqs.append(executor.Request(24, 1, 1, 4, 0.0, time()))
+
+            else:
+                reqs.append(executor.Request(42, 1, 0, 1, 0.0, time()))
+
+        def cycle():
+            locks = []
+
+            for req in reqs:
+                if executor._dispatch(lock := asyncio.Lock(), req):
+                    locks.append(lock)
+
+            for lock in locks:
+                executor._release(lock)
+
+        best, _ = timeit(cycle)
+        rows.append(('place / release', f'{best / nreqs * 1e6:.1f}us per request ({nreqs} requests, {nnodes} nodes)'))
+
+        # sorting the pending queue
+        pending = {asyncio.Lock(): req for req in reqs}
+        best, _ = timeit(lambda: sorted(pending.items(), key=executor._order, reverse=True))
+        rows.append(('sort pending', f'{best * 1e3:.2f}ms'))
+
+    report('dispatch', rows)
+
+
+def bench_mpiexec(nmpi: int):
+    """Overhead of launching commands and functions with the local launcher."""
+    rows = []
+
+    for label, cmd, bundle in (('command', 'true', False), ('function', noop, False), ('bundled function', noop, True)):
+        with workdir({'job': {'nnodes': 4, 'cpus_per_node': 4}}):
+            ws = Workspace(concurrent=True)
+
+            for i in range(nmpi):
+                ws.add(partial(d.mpiexec, cmd, bundle=bundle), f'mpi_{i:04d}')
+
+            with quiet():
+                start = perf_counter()
+                ws.run()
+                elapsed = perf_counter() - start
+
+            rows.append((label, f'{elapsed:.2f}s total, {elapsed / nmpi * 1e3:.1f}ms per task ({nmpi} tasks on 4 nodes)'))
+
+    report('mpiexec', rows)
+
+
+def bench_console(ntasks: int):
+    """Cost of rendering the status line with many running tasks."""
+    with workdir():
+        ws = Workspace(concurrent=True)
+
+        for j in range(ntasks):
+            ws.add(task := Task(noop, f'task_{j:05d}'))
+            task._transition(time(), None, None)
+
+        console._monitoring.extend(ws)
+
+        with quiet():
+            best, _ = timeit(console._render, 20)
+
+        report('console', [('render', f'{best * 1e3:.2f}ms with {ntasks} running tasks')])
+
+
+if __name__ == '__main__':
+    nevents = getint('nevents', 32)
+    niters = getint('niters', 3)
+    ntasks = getint('ntasks', 2000)
+    nmpi = getint('nmpi', 16)
+
+    bench_tree(nevents, niters, ntasks)
+    bench_checkpoint(nevents, niters, ntasks)
+    bench_paths(ntasks)
+    bench_execute(nevents, niters, ntasks)
+    bench_dispatch(nmpi * 16)
+    bench_mpiexec(nmpi)
+    bench_console(ntasks)
@@ -0,0 +1,202 @@
+# Performance of the source encoding data pipeline on synthetic ASDF datasets
+# python -m benchmarks.pipeline [--nevents=4] [--nstations=100] [--duration=60] [--nperiods=3]
+from __future__ import annotations
+
+import asyncio
+from os import path, remove
+from time import perf_counter
+from functools import partial
+from typing import Callable, List, Tuple, Any
+
+import numpy as np
+
+from pypers import Directory
+
+from .common import getint, workdir, peak_memory, report
+
+
+# time step of raw traces and encoded simulations (in seconds)
+dt = 0.5
+
+# transient state duration (in minutes)
+transient_duration = 20.0
+
+# components of traces
+components = ('N', 'E', 'Z')
+
+
+def _cmtsolution(event: str, rng: np.random.Generator) -> str:
+    """CMTSOLUTION of a synthetic event."""
+    lat, lon = rng.uniform(-60, 60), rng.uniform(-180, 180)
+    m = rng.normal(0, 1e26, 6)
+
+    return '\n'.join([
+        ' PDE 2010  7 23 22 51 11.40  6.4900  123.4500  620.0 7.3 7.3 SYNTHETIC',
+        f'event name:     {event}',
+        'time shift:     10.0000',
+        'half duration:  11.0000',
+        f'latitude:      {lat:9.4f}',
+        f'longitude:     {lon:9.4f}',
+        'depth:         30.0000',
+        *(f'{key}:       {val:.6e}' for key, val in zip(('Mrr', 'Mtt', 'Mpp', 'Mrt', 'Mrp', 'Mtp'), m)),
+        ''
+    ])
+
+
+def _traces(ds, tag: str, stations: List[str], npts: int, starttime):
+    """Add random traces of each station to an ASDFDataSet."""
+    from obspy import Stream, Trace
+
+    rng = np.random.default_rng(npts)
+
+    for station in stations:
+        net, sta = station.split('.')
+        traces = []
+
+        for cmp in components:
+            traces.append(Trace(rng.normal(0, 1e-6, npts), {
+                'network': net, 'station': sta, 'location': 'S3', 'channel': f'MX{cmp}',
+                'delta': dt, 'starttime': starttime
+            }))
+
+        ds.add_waveforms(Stream(traces), tag, event_id=ds.events[0])
+
+
+def generate(catalogdir: Directory, nevents: int, nstations: int, duration: float, ngroups: int):
+    """Write a synthetic catalog (events, stations, catalog.toml) and raw observed traces."""
+    from obspy import read_events
+    from pyasdf import ASDFDataSet
+
+    rng = np.random.default_rng(0)
+    events = [f'E{i:04d}' for i in range(nevents)]
+    stations = [f'N{i // 100:02d}.S{i % 100:03d}' for i in range(nstations)]
+    catalog = {}
+
+    for event in events:
+        catalogdir.write(_cmtsolution(event, rng), f'events/{event}')
+        catalogdir.writelines((f'{s.split(".")[1]} {s.split(".")[0]} {rng.uniform(-80, 80):.4f} {rng.uniform(-180, 180):.4f} 0.0 0.0'
+            for s in stations), f'stations/STATIONS.{event}')
+        catalog[event] = {station: [list(components)] * ngroups for station in stations}
+
+        # raw observed traces covering the transient state
+        e = read_events(catalogdir.abs(f'events/{event}'))[0]
+
+        with ASDFDataSet(catalogdir.abs(f'traces/{event}.h5'), mode='w', mpi=False) as ds:
+            ds.add_quakeml(e)
+            _traces(ds, 'raw_obs', stations, int(transient_duration * 60 / dt) + 600, e.preferred_origin().time)
+
+    catalogdir.dump(catalog, 'catalog.toml')
+
+    return events, stations
+
+
+def _raw_synthetic(src: str, dst: str, stations: List[str], duration: float):
+    """Write raw traces of encoded simulation."""
+    from obspy import read_events
+    from pyasdf import ASDFDataSet
+
+    e = read_events(src)[0]
+
+    with ASDFDataSet(dst, mode='w', mpi=False) as ds:
+        ds.add_quakeml(e)
+        _traces(ds, 'synthetic', stations, int(duration * 60 / dt), e.preferred_origin().time)
+
+
+def _onerror(e: Exception):
+    raise e
+
+
+def _process(src: Any, dst: str, func: Callable, input_type: str, input_tag: Any, output_tag: str):
+    """Run an ASDFProcessor in current process."""
+    from pypers.utils.asdf_processor import Processor
+
+    if path.exists(dst):
+        remove(dst)
+
+    Processor(src, dst, func, input_type, input_tag, output_tag, True, False, _onerror).run() # type: ignore
+
+
+def measure(name: str, func: Callable[[], Any], nstations: int) -> Tuple[str, str]:
+    """Time and peak traced memory of a stage (the stage is executed twice)."""
+    start = perf_counter()
+    func()
+    elapsed = perf_counter() - start
+
+    _, mem = peak_memory(func)
+
+    return name, f'{elapsed:8.3f}s  {nstations / elapsed:10.1f} stations/s  {mem / 2**20:8.1f}MB peak'
+
+
+if __name__ == '__main__':
+    nevents = getint('nevents', 4)
+    nstations = getint('nstations', 100)
+    duration = float(getint('duration', 60))
+    nperiods = getint('nperiods', 3)
+
+    # period bands, one frequency group between two adjacent periods
+    period_range = list(np.linspace(20, 40, nperiods))
+
+    with workdir({'path': {'catalog': 'catalog'}}) as d:
+        catalogdir = d.subdir('catalog')
+        events, stations = generate(catalogdir, nevents, nstations, duration, nperiods - 1)
+
+        # import after config.toml is written (catalog directory is read from config)
+        from pypers.kernel.ortho import Ortho as KernelOrtho
+        from pypers.misfit.ortho import Ortho as MisfitOrtho
+        from pypers.fwi.weightings import _compute_weightings
+
+        kernel = KernelOrtho('kernel', {
+            'dt': dt, 'duration': duration, 'transient_duration': transient_duration,
+            'period_range': period_range, 'randomize_frequency': 1
+        })
+
+        kernel._prepare_frequencies()
+        rows = []
+
+        rows.append(measure('encode events', lambda: asyncio.run(kernel._encode_events()), nstations))
+
+        # observed traces of each event to Fourier coefficients
+        def prepare_observed():
+            for event in events:
+                kernel.mkdir(kernel.freqstr)
+                _process(catalogdir.abs(f'traces/{event}.h5'), catalogdir.abs(f'{kernel.freqstr}/{event}.ft.h5'),
+                    partial(kernel._ft, event), 'stream', None, 'FT')
+
+        rows.append(measure('ft (observed)', prepare_observed, nstations * nevents))
+
+        rows.append(measure('encode observed', lambda: asyncio.run(kernel._encode_observed()), nstations))
+
+        # same stages with spectra in consolidated layout (misfit below reads consolidated observed traces)
+        kernel.consolidate_spectra = True
+        rows.append(measure('consolidate observed', kernel._consolidate_observed, nstations * nevents))
+        rows.append(measure('encode observed (consolidated)', lambda: asyncio.run(kernel._encode_observed()), nstations))
+
+        # encoded synthetic traces to Fourier coefficients
+        _raw_synthetic(kernel.abs('SUPERSOURCE'), kernel.abs('traces_raw.h5'), stations, duration)
+        rows.append(measure('ft (synthetic)', partial(_process, kernel.abs('traces_raw.h5'), kernel.abs('synthetic.ft.h5'),
+            partial(kernel._ft, None), 'stream', None, 'FT'), nstations))
+        rows.append(measure('ft (synthetic, array)', partial(_process, kernel.abs('traces_raw.h5'),
+            kernel.abs('synthetic.ft.h5'), kernel._ft_array, 'array', None, 'FT'), nstations))
+
+        # misfit and adjoint sources
+        for dd in (False, True):
+            misfit = MisfitOrtho(f'misfit_{int(dd)}', {
+                'path_observed': kernel.abs('observed.ft.h5'), 'path_synthetic': kernel.abs('synthetic.ft.h5'),
+                'phase_factor': 1.0, 'amplitude_factor': 1.0 if dd else 0.0, 'double_difference': dd,
+                'fslots': kernel.fslots
+            })
+            misfit.mkdir()
+
+            if dd:
+                rows.append(measure('diff', misfit._diff, nstations))
+
+            rows.append(measure(f'adjoint{" (double difference)" if dd else ""}', partial(_process,
+                misfit.path_synthetic, misfit.abs('adjoint.h5'), misfit._adjoint,
+                'auxiliary_group', 'FT', 'AdjointSources'), nstations))
+
+        # geographical weightings
+        ws = d.subdir('weightings')
+        ws.dump({s: (np.random.uniform(-80, 80), np.random.uniform(-180, 180)) for s in stations}, 'locations/station.bench.pickle')
+        rows.append(measure('station weightings', partial(_compute_weightings, ws, 'station.bench', 0.5), nstations)) # type: ignore
+
+        report(f'pipeline ({nevents} events, {nstations} stations, {len(kernel.freq)} frequencies)', rows)
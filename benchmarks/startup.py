@@ -0,0 +1,71 @@
+# Import time of pypers modules and startup time of MPI worker processes
+# python -m benchmarks.startup [--repeat=5]
+import sys
+from time import perf_counter
+from subprocess import run
+from typing import Optional, Tuple
+
+from pypers import basedir as d
+from pypers.core.config import getconfig
+from pypers.core.runtime import payload
+
+from .common import noop, getint, workdir, report
+
+
+# modules imported by MPI workers of common tasks
+modules = [
+    'pypers', 'pypers.core.config', 'pypers.core.job', 'pypers.core.main', 'pypers.core.workflow.workspace',
+    'pypers.fwi', 'pypers.fwi.catalog', 'pypers.fwi.weightings', 'pypers.fwi.process',
+    'pypers.kernel', 'pypers.kernel.ortho', 'pypers.misfit', 'pypers.misfit.ortho',
+    'pypers.solver', 'pypers.solver.specfem3d_globe', 'pypers.utils.asdf'
+]
+
+
+def import_time(module: str) -> Tuple[Optional[float], str]:
+    """Cumulative import time (in seconds) of a module in a new interpreter, or None and error message."""
+    proc = run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True)
+
+    if proc.returncode:
+        return None, proc.stderr.strip().split('\n')[-1]
+
+    for line in proc.stderr.split('\n'):
+        if line.startswith('import time:') and line.split('|')[-1].strip() == module:
+            return int(line.split('|')[1]) / 1e6, ''
+
+    return None, 'not found in -X importtime output'
+
+
+def wall_time(cmd: list, repeat: int) -> float:
+    """Best wall time of a command."""
+    times = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        run(cmd, check=True, capture_output=True)
+        times.append(perf_counter() - start)
+
+    return min(times)
+
+
+if __name__ == '__main__':
+    repeat = getint('repeat', 5)
+    rows = []
+
+    for module in modules:
+        t, error = import_time(module)
+        rows.append((module, f'{t * 1e3:8.1f}ms' if t is not None else f'unavailable ({error})'))
+
+    report('import time (cumulative)', rows)
+
+    with workdir():
+        # payload of a function that does nothing, as written by executor.mpiexec
+        with open(d.rel('mpiexec.noop.pickle'), 'wb') as fb:
+            payload.dump(fb, getconfig(), noop)
+
+        python = wall_time([sys.executable, '-c', 'pass'], repeat)
+        worker = wall_time([sys.executable, '-m', 'pypers.core.main', '--mpiexec=.:mpiexec.noop'], repeat)
+
+        report('worker startup', [
+            ('python', f'{python * 1e3:8.1f}ms'),
+            ('pypers worker', f'{worker * 1e3:8.1f}ms ({(worker - python) * 1e3:.1f}ms over python)')
+        ])
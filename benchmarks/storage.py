@@ -0,0 +1,137 @@
+# File size, write / read time and memory of spectra and adjoint sources in each storage precision and layout,
+# file size and write / read throughput of traces, spectra and adjoint sources in each storage profile
+# python -m benchmarks.storage [--nstations=500] [--nfreq=2000] [--nt=20000] [--profiles=none,lzf,gzip-4+shuffle]
+from __future__ import annotations
+
+from os import path
+from functools import partial
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+from pypers import Directory, getarg
+from pypers.utils.spectra import Spectra, write_spectra, dtypes
+from pypers.utils.storage import dataset_options
+
+from .common import getint, workdir, timeit, peak_memory, report
+
+
+# processing parameters saved with each channel (as written by Kernel._ft)
+params = {'npts': 24000, 'delta': 0.5, 'nt': 24000, 'dt': 0.5, 'nt_ts': 2400, 'nt_se': 21600, 'fidx': [100, 2100]}
+
+# storage profiles compared by default
+profiles = 'none,lzf,lzf+shuffle,gzip-1+shuffle,gzip-4+shuffle,gzip-4+shuffle+chunks=row'
+
+
+def write_asdf(data: Dict[str, np.ndarray], tag: str, dtype: Any, dst: str, storage: str = 'none'):
+    """Write one auxiliary dataset per channel with the same HDF5 layout as pyasdf."""
+    import h5py
+
+    with h5py.File(dst, 'w') as f:
+        group = f.create_group(f'AuxiliaryData/{tag}')
+
+        for key, val in data.items():
+            val = val.astype(dtype)
+            group.create_dataset(key, data=val, **dataset_options(val.shape, storage)).attrs.update(params)
+
+
+def write_waveforms(data: Dict[str, np.ndarray], storage: str, dst: str):
+    """Write one waveform dataset per trace with the same HDF5 layout as pyasdf."""
+    import h5py
+
+    with h5py.File(dst, 'w') as f:
+        for key, val in data.items():
+            net, sta, cha = key.split('_')
+            name = f'Waveforms/{net}.{sta}/{net}.{sta}..{cha}__2000-01-01T00:00:00__2000-01-01T03:20:00__raw_obs'
+            f.create_dataset(name, data=val, **dataset_options(val.shape, storage))
+
+
+def read_waveforms(src: str):
+    """Read all waveform datasets."""
+    import h5py
+
+    with h5py.File(src, 'r') as f:
+        for group in f['Waveforms'].values():
+            for trace in group.values():
+                trace[()]
+
+
+def read_all(tag: str, src: str) -> Dict[str, np.ndarray]:
+    """Read all channels through the spectra reader."""
+    with Spectra(src, tag) as sp:
+        return {key: sp[key] for key in sp.keys()}
+
+
+def read_stations(src: str):
+    """Read channels station by station (as misfit does)."""
+    with Spectra(src) as sp:
+        for station in sp.stations():
+            sp.station(station)
+
+
+def measure(d: Directory, label: str, fname: str, write: Callable[[str], Any], read: Callable[[str], Any],
+    nchannels: int) -> Tuple[str, str]:
+    """File size, write time, read time and peak memory of reading a file."""
+    dst = d.abs(fname)
+    write_time, _ = timeit(partial(write, dst), 3)
+    read_time, _ = timeit(partial(read, dst), 3)
+    _, mem = peak_memory(partial(read, dst))
+    size = path.getsize(dst)
+
+    return label, f'{size / 2**20:8.1f}MB  write {write_time:6.3f}s  read {read_time:6.3f}s ' \
+        f'({nchannels / read_time:9.0f} channels/s)  {mem / 2**20:8.1f}MB peak'
+
+
+def measure_profile(d: Directory, label: str, fname: str, write: Callable[[str], Any], read: Callable[[str], Any],
+    nbytes: int) -> Tuple[str, str]:
+    """File size (relative to uncompressed data) and throughput of uncompressed data in write and read."""
+    dst = d.abs(fname)
+    write_time, _ = timeit(partial(write, dst), 3)
+    read_time, _ = timeit(partial(read, dst), 3)
+    size = path.getsize(dst)
+
+    return label, f'{size / 2**20:8.1f}MB ({size / nbytes:4.0%})  ' \
+        f'write {nbytes / 2**20 / write_time:7.1f}MB/s  read {nbytes / 2**20 / read_time:7.1f}MB/s'
+
+
+if __name__ == '__main__':
+    nstations = getint('nstations', 500)
+    nfreq = getint('nfreq', 2000)
+    nt = getint('nt', 20000)
+
+    rng = np.random.default_rng(0)
+    keys = [f'N{i // 100:02d}_S{i % 100:03d}_MX{cmp}' for i in range(nstations) for cmp in 'NEZ']
+    spectra = {key: rng.normal(size=nfreq) + 1j * rng.normal(size=nfreq) for key in keys}
+    adjoint = {key: rng.normal(size=nt) for key in keys}
+
+    # raw traces in counts and smooth adjoint sources compress like real data, unlike white noise
+    kernel = np.hanning(50)
+    raw = {key: np.convolve(rng.normal(size=nt), kernel, 'same').astype(np.int32) * 1000 for key in keys}
+    smooth = {key: np.convolve(val, kernel / kernel.sum(), 'same') for key, val in adjoint.items()}
+
+    with workdir() as d:
+        for precision, (cdtype, rdtype) in dtypes.items():
+            consolidated = partial(write_spectra, spectra=spectra, params=dict.fromkeys(keys, params), dtype=cdtype)
+
+            report(f'{precision} precision ({len(keys)} channels, {nfreq} frequencies, {nt} adjoint samples)', [
+                measure(d, 'spectra (asdf)', 'asdf.ft.h5', partial(write_asdf, spectra, 'FT', cdtype),
+                    partial(read_all, 'FT'), len(keys)),
+                measure(d, 'spectra (consolidated)', 'consolidated.ft.h5', consolidated,
+                    partial(read_all, 'FT'), len(keys)),
+                measure(d, 'spectra (consolidated, by station)', 'consolidated.ft.h5', consolidated,
+                    read_stations, len(keys)),
+                measure(d, 'adjoint sources', 'adjoint.h5', partial(write_asdf, adjoint, 'AdjointSources', rdtype),
+                    partial(read_all, 'AdjointSources'), len(keys))
+            ])
+
+        for profile in (getarg('profiles') or profiles).split(','):
+            report(f'storage profile {profile} ({len(keys)} channels, single precision spectra and adjoint sources)', [
+                measure_profile(d, 'raw traces (int32)', 'raw.h5', partial(write_waveforms, raw, profile),
+                    read_waveforms, sum(val.nbytes for val in raw.values())),
+                measure_profile(d, 'spectra (consolidated)', 'consolidated.ft.h5', partial(write_spectra,
+                    spectra=spectra, params=dict.fromkeys(keys, params), dtype=np.complex64, storage=profile),
+                    read_stations, len(keys) * nfreq * 8),
+                measure_profile(d, 'adjoint sources (smooth)', 'adjoint.h5', partial(write_asdf,
+                    smooth, 'AdjointSources', np.float32, storage=profile),
+                    partial(read_all, 'AdjointSources'), len(keys) * nt * 4)
+            ])
@@ -1,19 +1,60 @@
-from .core.config import getarg, hasarg, getcfg, getsys, getpath
-from .core.job import load
+from typing import TYPE_CHECKING
 
-from .core.runtime import console
-from .core.runtime.misc import cache, ResubmitJob
-from .core.runtime.walltime import maketime, checktime, InsufficientTime
+from .utils.lazy import lazy
 
-from .core.workflow.directory import Directory
-from .core.workflow.node import Node
-from .core.workflow.task import Task
-from .core.workflow.workspace import Workspace, field
+if TYPE_CHECKING:
+    from .core.config import getarg, hasarg, getcfg, getsys, getpath
+    from .core.job import load
+
+    from .core.runtime import console
+    from .core.runtime.misc import cache, ResubmitJob
+    from .core.runtime.walltime import maketime, checktime, InsufficientTime
+
+    from .core.workflow.directory import Directory
+    from .core.workflow.node import Node
+    from .core.workflow.task import Task
+    from .core.workflow.workspace import Workspace, field
+
+    from .utils.func import runs_in
+
+    basedir: Directory
+
+
+# modules are imported when an exported name is first accessed, so that MPI processes only load what they use
+_getattr = lazy(__name__, {
+    'getarg': '.core.config',
+    'hasarg': '.core.config',
+    'getcfg': '.core.config',
+    'getsys': '.core.config',
+    'getpath': '.core.config',
+    'load': '.core.job',
+    'console': '.core.runtime.console',
+    'cache': '.core.runtime.misc',
+    'ResubmitJob': '.core.runtime.misc',
+    'maketime': '.core.runtime.walltime',
+    'checktime': '.core.runtime.walltime',
+    'InsufficientTime': '.core.runtime.walltime',
+    'Directory': '.core.workflow.directory',
+    'Node': '.core.workflow.node',
+    'Task': '.core.workflow.task',
+    'Workspace': '.core.workflow.workspace',
+    'field': '.core.workflow.workspace',
+    'runs_in': '.utils.func'
+})
+
+
+def __getattr__(name: str):
+    if name == 'basedir':
+        from .core.workflow.directory import Directory
+
+        globals()['basedir'] = Directory()
+        return globals()['basedir']
+
+    return _getattr(name)
 
-basedir = Directory()
 
 __all__ = [
     'getarg', 'hasarg', 'getcfg', 'getsys', 'getpath', 'load', 'console', 'cache',
     'maketime', 'checktime', 'InsufficientTime', 'ResubmitJob',
-    'Directory', 'Node', 'Task', 'Workspace', 'field', 'basedir'
+    'Directory', 'Node', 'Task', 'Workspace', 'field', 'runs_in', 'basedir'
 ]
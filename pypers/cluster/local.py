@@ -0,0 +1,83 @@
+from os import cpu_count
+from subprocess import Popen
+from typing import List, Tuple, Optional
+
+
+# number of CPUs per node (virtual nodes share the cores of current machine)
+cpus_per_node = cpu_count() or 1
+
+# number of GPUs per node
+gpus_per_node = 0
+
+
+def submit(cmd: str):
+    """Write job script and run it in background."""
+    # avoid circular import
+    from pypers import basedir
+
+    basedir.writelines(['#!/bin/sh', cmd + '\n'], 'job.bash')
+    requeue()
+
+
+def requeue():
+    """Run current job again."""
+    from pypers import basedir
+
+    with open(basedir.abs('job.out'), 'a') as f:
+        Popen('sh job.bash', shell=True, cwd=basedir.abs(), stdout=f, stderr=f, start_new_session=True)
+
+
+def mpiexec(cmd: str, nprocs: int, cpus_per_proc: int = 1, gpus_per_proc: int = 0,
+    placement: Optional[List[Tuple[int, List[int], List[int]]]] = None):
+    """Get the command to run processes on current machine, with job.mpirun (e.g. "mpirun --oversubscribe")
+        if given, otherwise with the process launcher of this module."""
+    from pypers import getcfg, getsys
+
+    if launcher := getcfg('job', 'mpirun'):
+        return f'{launcher} -n {nprocs} {cmd}'
+
+    bind = ''
+
+    if placement:
+        # map the CPUs of virtual nodes to the cores of current machine
+        ncpus = cpu_count() or 1
+        nc = getsys('cpus_per_node')
+        bind = ' --bind=' + ':'.join(','.join(str((node * nc + c) % ncpus) for c in cpus)
+            for node, cpus, _ in placement)
+
+    return f'python -m "pypers.cluster.local" -n {nprocs}{bind} -- {cmd}'
+
+
+def _launch(nprocs: int, cmd: str, bind: Optional[List[List[int]]] = None) -> int:
+    """Run a command in parallel processes, returns the first non-zero exit code."""
+    from os import environ, sched_setaffinity
+
+    procs = []
+
+    for rank in range(nprocs):
+        env = dict(environ, PYPERS_RANK=str(rank), PYPERS_SIZE=str(nprocs))
+        cpus = bind[rank] if bind else None
+
+        procs.append(Popen(cmd, shell=True, env=env,
+            preexec_fn=(lambda c=cpus: sched_setaffinity(0, c)) if cpus else None)) # type: ignore
+
+    codes = [p.wait() for p in procs]
+
+    return next((c for c in codes if c), 0)
+
+
+if __name__ == '__main__':
+    from sys import argv, exit
+    from shlex import join
+
+    # python -m pypers.cluster.local -n <nprocs> [--bind=<cpus of rank 0>:<cpus of rank 1>...] -- <cmd>
+    sep = argv.index('--')
+    opts = argv[1:sep]
+    nprocs = int(opts[opts.index('-n') + 1])
+    bind = None
+
+    for opt in opts:
+        if opt.startswith('--bind='):
+            bind = [[int(c) for c in cpus.split(',')] for cpus in opt[7:].split(':')]
+
+    exit(_launch(nprocs, join(argv[sep + 1:]), bind))
@@ -1,6 +1,7 @@
 from os import environ
 from textwrap import dedent
 from subprocess import check_call
+from typing import List, Tuple, Optional
 
 
 # number of CPUs per node
@@ -9,6 +10,9 @@ cpus_per_node = 42
 # number of GPUs per node
 gpus_per_node = 6
 
+# number of hardware threads per CPU core
+threads_per_cpu = 4
+
 
 def submit(cmd: str):
     """Write and submit job script."""
@@ -44,8 +48,41 @@ def requeue():
     check_call('brequeue ' + environ['LSB_JOBID'], shell=True)
 
 
-def mpiexec(cmd: str, nprocs: int, cpus_per_proc: int = 1, gpus_per_proc: int = 0):
-    """Get the command to call MPI."""
+def _erf(placement: List[Tuple[int, List[int], List[int]]]) -> str:
+    """Write explicit resource file for jsrun, returns the path to the file."""
+    from hashlib import sha1
+    from pypers import basedir
+
+    lines = ['cpu_index_using: logical']
+
+    for rank, (node, cpus, gpus) in enumerate(placement):
+        # host 0 is the launch node, hardware threads of each core are assigned to the process
+        threads = ','.join(f'{c * threads_per_cpu}-{(c + 1) * threads_per_cpu - 1}' for c in cpus)
+        line = f'rank: {rank}: {{ host: {node + 1}; cpu: {{{threads}}}'
+
+        if gpus:
+            line += f'; gpu: {{{",".join(str(g) for g in gpus)}}}'
+
+        lines.append(line + ' }')
+
+    text = '\n'.join(lines) + '\n'
+    dst = f'erf/{sha1(text.encode()).hexdigest()}.erf'
+
+    if not basedir.has(dst):
+        basedir.write(text, dst)
+
+    return basedir.abs(dst)
+
+
+def mpiexec(cmd: str, nprocs: int, cpus_per_proc: int = 1, gpus_per_proc: int = 0,
+    placement: Optional[List[Tuple[int, List[int], List[int]]]] = None):
+    """Get the command to call MPI (placement is a list of node, CPU and GPU indices of each process)."""
     flags = ' --smpiargs="off"' if nprocs == 1 else ''
 
+    if placement:
+        # pin processes to the CPUs and GPUs assigned by executor, so that nodes can be shared
+        # (the resource file is removed after the launch, CPUs of a placement are not shared by concurrent launches)
+        erf = _erf(placement)
+        return f'jsrun{flags} --erf_input {erf} {cmd}; status=$?; rm -f {erf}; exit $status'
+
     return f'jsrun{flags} -n {nprocs} -a 1 -c {cpus_per_proc} -g {gpus_per_proc} {cmd}'
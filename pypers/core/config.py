@@ -1,54 +1,155 @@
+from __future__ import annotations
+
 from sys import argv
 from os import path
-from typing import Optional, Any
+from types import ModuleType
+from typing import Optional, Any, Dict, Set, Iterator, Mapping
 from importlib import import_module
-import toml
 
 from pypers.core.runtime.misc import cache
 
 
+class Section(Mapping):
+    """Read-only entries of a config.toml section, missing attributes are None."""
+    # section entries
+    _entries: Dict[str, Any]
+
+    def __init__(self, entries: Dict[str, Any]):
+        object.__setattr__(self, '_entries', entries)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getattr__(self, key: str) -> Any:
+        if key.startswith('_'):
+            raise AttributeError(key)
+
+        return self._entries.get(key)
+
+    def __setattr__(self, key: str, val: Any):
+        raise AttributeError('config sections are read-only')
+
+    def __getstate__(self):
+        return self._entries
+
+    def __setstate__(self, entries: Dict[str, Any]):
+        object.__setattr__(self, '_entries', entries)
+
+
+# section that does not exist in config.toml
+_empty = Section({})
+
+
+class Config:
+    """Parsed config.toml with resolved cluster module, sections are accessed as attributes (e.g. config.job.nnodes)."""
+    # config.toml sections
+    _sections: Dict[str, Section]
+
+    # module of selected cluster
+    _cluster: Optional[ModuleType] = None
+
+    def __init__(self, entries: Dict[str, Dict[str, Any]]):
+        self._sections = {name: Section(dict(vals)) for name, vals in entries.items() if isinstance(vals, dict)}
+
+    def __getattr__(self, section: str) -> Section:
+        if section.startswith('_'):
+            raise AttributeError(section)
+
+        return self._sections.get(section, _empty)
+
+    def __getstate__(self):
+        # module of cluster is imported again when needed
+        return {'_sections': self._sections}
+
+    def get(self, section: str, key: str) -> Any:
+        """Get a config entry, None if not exists."""
+        return self._sections.get(section, _empty)._entries.get(key)
+
+    def todict(self) -> Dict[str, Dict[str, Any]]:
+        """Copy of config entries as nested dicts (e.g. for writing config.toml)."""
+        return {name: dict(section._entries) for name, section in self._sections.items()}
+
+    @property
+    def cluster(self) -> ModuleType:
+        """Module of selected cluster."""
+        if self._cluster is None:
+            self._cluster = import_module(f'pypers.cluster.{self.get("job", "cluster")}')
+
+        return self._cluster
+
+
+# named values (--key=value) and flags (-r) from sys.argv
+_args: Optional[Dict[str, str]] = None
+_flags: Optional[Set[str]] = None
+
+
+def _parse():
+    """Parse sys.argv."""
+    global _args, _flags
+
+    _args = {}
+    _flags = set(argv)
+
+    for arg in argv[1:]:
+        if arg.startswith('--') and '=' in arg:
+            _args.setdefault(arg[2:].split('=')[0], arg.split('=')[1])
+
+
 def getarg(key: str) -> Optional[str]:
     """Get named value from sys.argv."""
-    for arg in argv[1:]:
-        if arg.startswith(f'--{key}='):
-            return arg.split('=')[1]
-    
-    return None
+    if _args is None:
+        _parse()
+
+    return _args.get(key) # type: ignore
 
 
 def hasarg(key: str) -> bool:
     """Check if sys.argv has a specific argument."""
-    return f'-{key}' in argv or getarg(key) is not None
+    if _flags is None:
+        _parse()
 
+    return f'-{key}' in _flags or key in _args # type: ignore
 
-def getcfg(section: str, key: str) -> Any:
-    """Get a copy of a config entry."""
-    # load config.toml
+
+def getconfig() -> Config:
+    """Get parsed config.toml (empty if config.toml does not exist)."""
     if 'config' not in cache:
         if not path.exists('config.toml'):
-            return None
+            return Config({})
+
+        import toml
 
         with open('config.toml', 'r') as f:
-            cache['config'] = toml.load(f)
+            cache['config'] = Config(toml.load(f))
 
-    if section in cache['config'] and key in cache['config'][section]:
-        return cache['config'][section][key]
+    return cache['config']
+
+
+def getcfg(section: str, key: str) -> Any:
+    """Get a config entry."""
+    # inlined Config.get() because this is called in hot paths
+    return (cache.get('config') or getconfig())._sections.get(section, _empty)._entries.get(key)
 
-    return None
 
 def getsys(key: str):
     """Get the configuration of selected cluster."""
-    if key in ('cpus_per_node', 'gpus_per_node') and (val := getcfg('job', key)) is not None:
+    config = cache.get('config') or getconfig()
+
+    if key in ('cpus_per_node', 'gpus_per_node') and (val := config.get('job', key)) is not None:
         return val
-    
-    cluster = getcfg('job', 'cluster')
 
-    return getattr(import_module(f'pypers.cluster.{cluster}'), key)
+    return getattr(config.cluster, key)
 
 
 def getpath(name: str, *paths: str):
     """Get path from config.toml."""
     if (src := getcfg('path', name)) is not None:
         return path.abspath(path.join(src, *paths))
-    
+
     return ''
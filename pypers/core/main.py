@@ -1,8 +1,11 @@
-from asyncio import run, iscoroutine
+import pickle
+from os import path
+from time import time
+from types import CoroutineType
 
 from pypers.core.config import getarg, hasarg, getsys, getcfg
 from pypers.core.job import load, add_error
-from pypers.core.workflow.directory import Directory
+from pypers.core.runtime.misc import cache
 
 
 if __name__ == "__main__":
@@ -10,9 +13,20 @@ if __name__ == "__main__":
     if hasarg('mpiexec'):
         try:
             cwd, fid = getarg('mpiexec').split(':')
-            func = Directory(cwd).load(f'{fid}.pickle')
 
-            if iscoroutine(result := func()):
+            # report start time for launch overhead accounting
+            with open(path.join(cwd, f'{fid}.start'), 'a') as f:
+                f.write(f'{time()}\n')
+
+            # config snapshot of the main process, then the function
+            with open(path.join(cwd, f'{fid}.pickle'), 'rb') as fb:
+                cache['config'] = pickle.load(fb)
+                func = pickle.load(fb)
+
+            # asyncio is only imported by functions that need it
+            if isinstance(result := func(), CoroutineType):
+                from asyncio import run
+
                 run(result)
         
         except Exception as e:
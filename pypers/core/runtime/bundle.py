@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from os import environ, path
+from typing import Callable, List, Tuple
+
+
+# environment variables containing the rank of current process (jsrun, Open MPI, MPICH, local launcher)
+rank_vars = ('JSM_NAMESPACE_RANK', 'OMPI_COMM_WORLD_RANK', 'PMI_RANK', 'PYPERS_RANK')
+
+
+def getrank() -> int:
+    """Rank of current process in a parallel launch."""
+    for key in rank_vars:
+        if key in environ:
+            return int(environ[key])
+
+    return 0
+
+
+class Bundle:
+    """Serial functions executed in a single parallel launch, one function per rank."""
+    # working directory, file id and function of each bundled task
+    entries: List[Tuple[str, str, Callable]]
+
+    def __init__(self, entries: List[Tuple[str, str, Callable]]):
+        from pypers.utils.func import get_name
+
+        self.entries = entries
+        self.__name__ = get_name(entries[0][2]) if entries else 'bundle'
+
+    def __call__(self):
+        """Execute the function of current rank, output and error are saved to the directory of the task."""
+        from asyncio import run, iscoroutine
+        from traceback import format_exc
+        from contextlib import redirect_stdout, redirect_stderr
+        from pypers.core.workflow.directory import Directory
+
+        rank = getrank()
+
+        if rank >= len(self.entries):
+            return
+
+        cwd, fid, func = self.entries[rank]
+
+        with open(path.join(cwd, f'{fid}.out'), 'a') as f, redirect_stdout(f), redirect_stderr(f):
+            try:
+                if iscoroutine(result := func()):
+                    run(result)
+
+            except Exception:
+                Directory(cwd).write(format_exc(), f'{fid}.error', 'a')
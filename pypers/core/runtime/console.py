@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from sys import stdout, stderr
-from typing import TYPE_CHECKING
+from time import time
+from functools import partial
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Set, Union, Optional, TYPE_CHECKING
 import asyncio
 
-from pypers.core.config import hasarg
+from pypers.core.config import hasarg, getcfg
+from pypers.core.runtime.misc import cache
 
 if TYPE_CHECKING:
     from pypers import Task
@@ -14,32 +19,180 @@ if TYPE_CHECKING:
 _nchars = 0
 
 # tasks being monitored
-_monitoring = []
+_monitoring: List[Task] = []
 
 # whether console.loop is running
 _looping = False
 
+# thread pool to run probers
+_pool: Optional[ThreadPoolExecutor] = None
+
+# latest prober output of monitored tasks
+_progress: Dict[Task, Union[str, float, None]] = {}
+
+# time when a task is last probed
+_probed: Dict[Task, float] = {}
+
+# tasks whose prober is being executed
+_probing: Set[Task] = set()
+
+# lock of each monitored task, so that a task is not probed by multiple threads at the same time
+_locks: Dict[Task, Lock] = {}
+
+# number of finished, failed and paused (ResubmitJob) tasks in current run
+_ndone = 0
+_nfailed = 0
+_npaused = 0
+
+# last displayed stat message
+_line = ''
+
+# prober output changed since status file is written
+_changed = False
+
+
+def reset():
+    """Clear monitored tasks and counters (e.g. before running another job in the same process)."""
+    global _nchars, _looping, _ndone, _nfailed, _npaused, _line, _changed
+
+    _monitoring.clear()
+    _progress.clear()
+    _probed.clear()
+    _probing.clear()
+    _locks.clear()
+    _nchars = _ndone = _nfailed = _npaused = 0
+    _looping = _changed = False
+    _line = ''
+
+
+def _update(task: Task, future: asyncio.Future):
+    """Save the output of a prober."""
+    _probing.discard(task)
+
+    global _changed
+
+    if task in _monitoring and not future.cancelled():
+        progress = None if future.exception() else future.result()
+
+        if progress != _progress.get(task):
+            from pypers.core.runtime import status
+
+            _progress[task] = progress
+            status.update(task)
+            _changed = True
+
+        _render()
+
+
+def _eta(task: Task) -> Optional[float]:
+    """Estimated remaining time in seconds."""
+    progress = _progress.get(task)
+    
+    if isinstance(progress, float) and 0 < progress <= 1 and (elapsed := task.elapsed):
+        return elapsed * (1 - progress) / progress
+    
+    return None
+
+
+def _format(task: Task) -> str:
+    """Name and progress of a task."""
+    progress = _progress.get(task)
+
+    if isinstance(progress, float) and 0 <= progress <= 1:
+        state = f'{int(progress * 100)}%'
+
+        if (eta := _eta(task)) is not None:
+            state += f', {eta/60:.1f}min left'
+
+    elif isinstance(progress, str):
+        state = progress
+
+    else:
+        state = 'running'
+
+    return f'{task.name} ({state})'
+
+
+def _render():
+    """Display aggregated status of monitored tasks if changed."""
+    global _line
+
+    if len(_monitoring) == 0:
+        return
+
+    if len(_monitoring) == 1:
+        task = _monitoring[0]
+        line = '  ' * task.level + _format(task)
+    
+    else:
+        # counts by state
+        counts = [f'{len(_monitoring)} running']
+
+        if _ndone:
+            counts.append(f'{_ndone} done')
+
+        if _nfailed:
+            counts.append(f'{_nfailed} failed')
+
+        if _npaused:
+            counts.append(f'{_npaused} paused')
+
+        # tasks with the longest remaining time, then the least progress
+        def key(task: Task):
+            eta = _eta(task)
+            return (eta is not None, eta or 0.0, task.elapsed or 0.0)
+
+        slowest = sorted(_monitoring, key=key, reverse=True)[:2]
+        line = '  ' * min(task.level for task in _monitoring) + f'[{", ".join(counts)}] ' + ', '.join(_format(task) for task in slowest)
+
+        if len(_monitoring) > len(slowest):
+            line += ', ...'
+
+    if line != _line:
+        _line = line
+        stat(line)
+
 
 async def _loop():
-    """Periodically print node status."""
-    global _looping
+    """Probe monitored tasks in a thread pool and print aggregated status."""
+    global _looping, _pool, _line, _changed
+
+    from pypers.core.runtime import status
+
+    loop = asyncio.get_running_loop()
+    interval = getcfg('job', 'probe_interval') or 2
+    written = time()
+
+    if _pool is None:
+        _pool = ThreadPoolExecutor(4, 'prober')
 
     while len(_monitoring):
-        if len(_monitoring) > 1:
-            for i, task in enumerate(_monitoring):
-                stat('  ' * task.level + f'({i+1}/{len(_monitoring)}) {task}')
-                await asyncio.sleep(2)
-        
-        else:
-            stat('  ' * _monitoring[0].level + str(_monitoring[0]))
-            await asyncio.sleep(2)
+        now = time()
+
+        for task in _monitoring:
+            # skip tasks being probed or probed recently
+            if task.has_prober and task not in _probing and now - _probed.get(task, 0) >= interval:
+                _probing.add(task)
+                _probed[task] = now
+                loop.run_in_executor(_pool, probe, task).add_done_callback(partial(_update, task))
 
+        _render()
+
+        # update progress in status file
+        if _changed and now - written >= 5 and 'job' in cache:
+            status.write(cache['job'])
+            written = now
+            _changed = False
+
+        await asyncio.sleep(0.5)
+
+    _line = ''
     _looping = False
 
 
 def clear():
     """Clear current line."""
-    global _nchars
+    global _nchars, _line
 
     stdout.write('\r')
 
@@ -50,6 +203,7 @@ def clear():
     stdout.flush()
 
     _nchars = 0
+    _line = ''
 
 
 def error(msg: str):
@@ -77,12 +231,34 @@ def stat(msg: str):
     _nchars = len(msg)
 
 
+def probe(task: Task) -> Union[str, float, None]:
+    """Call the prober of a task. Probes of a monitored task are serialized,
+        the latest prober output is returned if the task is being probed by another thread."""
+    if (lock := _locks.get(task)) is None:
+        return task._probe()
+
+    if not lock.acquire(blocking=False):
+        return _progress.get(task)
+
+    try:
+        return task._probe()
+
+    finally:
+        lock.release()
+
+
+def progress(task: Task) -> Union[str, float, None]:
+    """Latest prober output of a monitored task."""
+    return _progress.get(task)
+
+
 def monitor(task: Task):
     """Monitor the execution status of task."""
     global _looping
 
     if task not in _monitoring:
         _monitoring.append(task)
+        _locks[task] = Lock()
 
     if not _looping and not hasarg('r'):
         _looping = True
@@ -91,7 +267,21 @@ def monitor(task: Task):
 
 def unlink(task: Task):
     """Remove task from monitor list."""
+    global _ndone, _nfailed, _npaused
+
     if task in _monitoring:
         _monitoring.remove(task)
+        _progress.pop(task, None)
+        _probed.pop(task, None)
+        _locks.pop(task, None)
+
+        if task.error:
+            _nfailed += 1
+        
+        elif task.exception:
+            _npaused += 1
+        
+        else:
+            _ndone += 1
 
         log('  ' * task.level + task.name)
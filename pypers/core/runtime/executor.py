@@ -1,44 +1,276 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional, Callable, Union, Dict, cast
+from typing import Optional, Callable, Union, Dict, List, Set, Tuple, cast
+from collections import namedtuple
 from math import ceil
 from time import time
+from uuid import uuid4
 
 from pypers.core.workflow.directory import Directory
-from pypers.core.config import getsys, getcfg, hasarg
+from pypers.core.config import getsys, getcfg, getconfig, hasarg
 from pypers.core.runtime.walltime import maketime, checktime, InsufficientTime
-from pypers.core.runtime.misc import ResubmitJob
+from pypers.core.runtime.misc import ResubmitJob, current_task
+from pypers.core.runtime import server, trace, payload
+from pypers.core.runtime.bundle import Bundle
 from pypers.utils.func import get_name
 
 
+# resource request of a pending task (nnodes is the minimum number of nodes to place all processes)
+Request = namedtuple('Request', ('nprocs', 'cpus_per_proc', 'gpus_per_proc', 'nnodes', 'priority', 'time'))
+
 # pending tasks
-_pending: Dict[asyncio.Lock, int] = {}
+_pending: Dict[asyncio.Lock, Request] = {}
 
-# running tasks
-_running: Dict[asyncio.Lock, int] = {}
+# running tasks and their placements, a placement is a list of (node, CPU indices, GPU indices) of each process
+_running: Dict[asyncio.Lock, List[Tuple[int, List[int], List[int]]]] = {}
 
+# free CPU and GPU indices of each node
+_free: List[Tuple[Set[int], Set[int]]] = []
 
-def _dispatch(lock: asyncio.Lock, nnodes: int) -> bool:
-    """Execute a task if resource is available."""
+# functions waiting to be bundled, grouped by CPUs / GPUs per process, walltime and resubmit flag
+_bundles: Dict[tuple, List[Tuple[Directory, Callable, float, asyncio.Future]]] = {}
+
+# errors of pending tasks that failed to be dispatched
+_errors: Dict[asyncio.Lock, Exception] = {}
+
+
+def reset():
+    """Clear resource model and task queue (e.g. before running another job in the same process)."""
+    _pending.clear()
+    _running.clear()
+    _free.clear()
+    _bundles.clear()
+    _errors.clear()
+
+
+def _init_nodes():
+    """Initialize resource model from the number of nodes and CPUs / GPUs per node."""
+    if len(_free) == 0:
+        for _ in range(getcfg('job', 'nnodes')):
+            _free.append((set(range(getsys('cpus_per_node'))), set(range(getsys('gpus_per_node')))))
+
+
+def nodes_in_use() -> int:
+    """Number of nodes running at least one process."""
+    _init_nodes()
+    
+    return sum(1 for cpus, gpus in _free if len(cpus) < getsys('cpus_per_node') or len(gpus) < getsys('gpus_per_node'))
+
+
+def _count_nodes():
+    """Record the number of nodes in use."""
+    if trace.enabled():
+        ntotal = getcfg('job', 'nnodes')
+        running = nodes_in_use()
+        trace.counter('nodes', running=running, pending=sum(r.nnodes for r in _pending.values()), idle=ntotal - running, total=ntotal)
+
+
+def _capacity(cpus_per_proc: int, gpus_per_proc: int) -> Optional[int]:
+    """Number of processes that fit in an empty node, None if processes do not use any resource."""
+    n = getsys('cpus_per_node') // cpus_per_proc if cpus_per_proc > 0 else None
+
+    if gpus_per_proc > 0:
+        m = getsys('gpus_per_node') // gpus_per_proc
+        n = m if n is None else min(n, m)
+
+    return n
+
+
+def _validate(req: Request):
+    """Raise an error if a request cannot be placed even when all nodes are free."""
     ntotal: int = getcfg('job', 'nnodes')
 
-    if nnodes > ntotal:
-        raise RuntimeError(f'Insufficient nodes ({nnodes} / {ntotal})')
+    if _capacity(req.cpus_per_proc, req.gpus_per_proc) == 0:
+        raise RuntimeError(f'Insufficient resource per node ({req.cpus_per_proc} CPUs, {req.gpus_per_proc} GPUs per process)')
+
+    if req.nnodes > ntotal:
+        raise RuntimeError(f'Insufficient nodes ({req.nnodes} / {ntotal})')
+
+
+def _place(req: Request) -> Optional[List[Tuple[int, List[int], List[int]]]]:
+    """Find CPUs and GPUs for each process, returns None if resource is not available.
+        CPU-only tasks are packed onto nodes whose GPUs are busy and GPU tasks onto nodes whose CPUs are busy."""
+    ncpus = req.cpus_per_proc
+    ngpus = req.gpus_per_proc
+
+    # prefer nodes with the least free resource of the kind not requested, then the best fit
+    if ngpus > 0:
+        order = sorted(range(len(_free)), key=lambda i: (len(_free[i][0]), len(_free[i][1])))
+    
+    else:
+        order = sorted(range(len(_free)), key=lambda i: (len(_free[i][1]), len(_free[i][0])))
+    
+    placement = []
+
+    for i in order:
+        cpus, gpus = sorted(_free[i][0]), sorted(_free[i][1])
+
+        # number of processes that fit in current node
+        n = len(cpus) // ncpus if ncpus > 0 else req.nprocs
+
+        if ngpus > 0:
+            n = min(n, len(gpus) // ngpus)
+
+        for j in range(min(n, req.nprocs - len(placement))):
+            placement.append((i, cpus[j * ncpus: (j + 1) * ncpus], gpus[j * ngpus: (j + 1) * ngpus]))
+        
+        if len(placement) == req.nprocs:
+            return placement
+    
+    return None
+
+
+def _dispatch(lock: asyncio.Lock, req: Request) -> bool:
+    """Execute a task if resource is available."""
+    _init_nodes()
+
+    if placement := _place(req):
+        for i, cpus, gpus in placement:
+            _free[i][0].difference_update(cpus)
+            _free[i][1].difference_update(gpus)
 
-    if nnodes <= ntotal - sum(_running.values()):
-        _running[lock] = nnodes
+        _running[lock] = placement
         return True
     
     return False
 
 
+def _release(lock: asyncio.Lock):
+    """Return resources of a finished task."""
+    for i, cpus, gpus in _running.pop(lock):
+        _free[i][0].update(cpus)
+        _free[i][1].update(gpus)
+
+
+def _aged(req: Request) -> bool:
+    """Pending task has waited longer than job.max_wait (in minutes, default 30)."""
+    return time() - req.time >= (getcfg('job', 'max_wait') or 30) * 60
+
+
+def _order(item: Tuple[asyncio.Lock, Request]):
+    """Sort key of pending tasks: aged tasks first (oldest first), then priority, then node number."""
+    req = item[1]
+
+    if _aged(req):
+        return (1, -req.time, req.nnodes)
+
+    return (0, req.priority, req.nnodes)
+
+
+def _schedule():
+    """Dispatch pending tasks by their priority and node number if resource is available."""
+    for lock, req in sorted(_pending.items(), key=_order, reverse=True):
+        try:
+            dispatched = _dispatch(lock, req)
+
+        except Exception as e:
+            # wake the pending task with its own error
+            _errors[lock] = e
+            dispatched = True
+
+        if dispatched:
+            del _pending[lock]
+            lock.release()
+
+        elif _aged(req):
+            # keep remaining nodes for the task waiting too long
+            break
+
+    _count_nodes()
+
+
+def _cleanup(d: Directory, fid: str):
+    """Remove the launch files of a successful function call, its output is appended to mpiexec.out."""
+    if d.has(f'{fid}.out'):
+        d.write(d.read(f'{fid}.out'), 'mpiexec.out', 'a')
+
+    d.rm(f'{fid}.*')
+
+
+async def _launch(key: tuple, items: List[Tuple[Directory, Callable, float, asyncio.Future]]):
+    """Execute bundled functions in one launch and resolve the future of each function."""
+    cpus_per_proc, gpus_per_proc, walltime, resubmit = key
+    entries = []
+    error = None
+
+    for d, func, _, _ in items:
+        fid = f'mpiexec.{uuid4().hex}'
+        d.mkdir()
+        entries.append((d.rel(), fid, func))
+
+    try:
+        # launch files of the bundle are saved separately from the files of bundled functions
+        await mpiexec(Directory('bundles'), Bundle(entries), len(items), cpus_per_proc, gpus_per_proc, walltime, resubmit,
+            max(item[2] for item in items))
+
+    except Exception as e:
+        error = e
+
+    errcls = ResubmitJob if resubmit else RuntimeError
+
+    for (d, _, _, future), (_, fid, _) in zip(items, entries):
+        if d.has(f'{fid}.error'):
+            future.set_exception(errcls(d.read(f'{fid}.error')))
+
+        elif error:
+            future.set_exception(error)
+
+        else:
+            _cleanup(d, fid)
+            future.set_result(None)
+
+
+async def _flush(key: tuple):
+    """Collect functions submitted within job.bundle_window seconds (default 1) and launch them by node."""
+    await asyncio.sleep(getcfg('job', 'bundle_window') or 1)
+
+    # bundled launches are not accounted to the task that happened to start the bundle
+    current_task.set(None)
+
+    items = _bundles.pop(key)
+    cpus_per_proc, gpus_per_proc = key[:2]
+
+    # number of functions that fit in a node
+    size = _capacity(cpus_per_proc, gpus_per_proc) or len(items)
+
+    await asyncio.gather(*(_launch(key, items[i: i + size]) for i in range(0, len(items), max(size, 1))))
+
+
+async def _bundle(d: Directory, func: Callable, cpus_per_proc: int, gpus_per_proc: int,
+    walltime: Optional[Union[float, str]], resubmit: bool, priority: Optional[float]):
+    """Add a function to the bundle of functions with the same resource request."""
+    if priority is None:
+        priority = task.priority if (task := current_task.get()) else 0.0
+
+    key = (cpus_per_proc, gpus_per_proc, walltime, resubmit)
+    future = asyncio.get_running_loop().create_future()
+
+    if key not in _bundles:
+        _bundles[key] = []
+        asyncio.create_task(_flush(key))
+
+    _bundles[key].append((d, func, priority, future))
+    server.count('mpiexec_bundled_total')
+
+    await future
+
+
 async def mpiexec(d: Directory, cmd: Union[str, Callable],
-    nprocs: int, cpus_per_proc: int, gpus_per_proc: int, walltime: Optional[Union[float, str]], resubmit: bool = False):
+    nprocs: int, cpus_per_proc: int, gpus_per_proc: int, walltime: Optional[Union[float, str]], resubmit: bool = False,
+    priority: Optional[float] = None, bundle: bool = False):
     """Schedule the execution of MPI task"""
+    if bundle and callable(cmd) and nprocs == 1:
+        # launch serial functions together to reduce launcher overhead
+        return await _bundle(d, cmd, cpus_per_proc, gpus_per_proc, walltime, resubmit, priority)
+
     # task queue controller
     lock = asyncio.Lock()
 
+    # time of request, dispatch, process start and process exit
+    time_request = time()
+    time_dispatch = time_start = time_exit = None
+
     # error occurred
     error = None
 
@@ -47,18 +279,34 @@ async def mpiexec(d: Directory, cmd: Union[str, Callable],
         walltime = cast(Optional[float], getcfg('walltime', walltime))
     
     try:
-        # calculate node number
-        nnodes = int(ceil(nprocs * cpus_per_proc  / getsys('cpus_per_node')))
+        # calculate number of nodes from the number of processes that fit in a node
+        capacity = _capacity(cpus_per_proc, gpus_per_proc)
+        nnodes = int(ceil(nprocs / capacity)) if capacity else 0
 
-        if gpus_per_proc > 0:
-            nnodes = max(nnodes, int(ceil(nprocs * gpus_per_proc  / getsys('gpus_per_node'))))
+        # priority from caller task
+        if priority is None:
+            priority = task.priority if (task := current_task.get()) else 0.0
 
-        # wait for node resources
+        req = Request(nprocs, cpus_per_proc, gpus_per_proc, nnodes, priority, time_request)
+
+        # fail before queueing if the request can never be placed
+        _validate(req)
+
+        # wait for node resources (nodes are reserved for tasks waiting too long)
         await lock.acquire()
+        queue_start = trace.now()
 
-        if not _dispatch(lock, nnodes):
-            _pending[lock] = nnodes
+        if any(_aged(r) for r in _pending.values()) or not _dispatch(lock, req):
+            _pending[lock] = req
+            _count_nodes()
             await lock.acquire()
+
+            if lock in _errors:
+                raise _errors.pop(lock)
+        
+        _count_nodes()
+        trace.complete('queue', 'mpiexec', queue_start, nnodes=nnodes, cwd=d.rel())
+        time_dispatch = time()
         
         # make sure remaining time is enough
         if walltime:
@@ -66,20 +314,26 @@ async def mpiexec(d: Directory, cmd: Union[str, Callable],
 
         # save function as pickle to run in parallel
         if callable(cmd):
-            funcname = get_name(cmd) + '\n'
+            name = get_name(cmd)
+            funcname = name + '\n'
             cwd = None
-            fid = f'mpiexec.{id(cmd)}'
-            d.rm(f'{fid}.*')
-            d.dump(cmd, f'{fid}.pickle')
+            fid = f'mpiexec.{uuid4().hex}'
+            d.mkdir()
+
+            # config is saved before the function so that workers do not parse config.toml
+            # and modules imported when loading the function see the same config
+            with open(d.rel(f'{fid}.pickle'), 'wb') as fb:
+                funcname += f'payload: {payload.dump(fb, getconfig(), cmd) / 1024:.1f}KB\n'
             cmd = f'python -m "pypers.core.main" --mpiexec={d.rel()}:{fid}'
         
         else:
+            name = cmd.split()[0].split('/')[-1]
             funcname = ''
             cwd = d.rel()
             fid = 'mpiexec'
         
         # wrap with parallel execution command
-        cmd = getsys('mpiexec')(cmd, nprocs, cpus_per_proc, gpus_per_proc)
+        cmd = getsys('mpiexec')(cmd, nprocs, cpus_per_proc, gpus_per_proc, _running[lock])
         
         # create subprocess to execute task
         with open(d.rel(f'{fid}.out'), 'a') as f:
@@ -88,6 +342,7 @@ async def mpiexec(d: Directory, cmd: Union[str, Callable],
         with open(d.rel(f'{fid}.out'), 'a') as f:
             process = await asyncio.create_subprocess_shell(cast(str, cmd), cwd=cwd, stdout=f, stderr=f)
             time_start = time()
+            run_start = trace.now()
         
             if walltime and hasarg('r') and getcfg('job', 'requeue'):
                 # abort when less than 1 minute remain
@@ -106,7 +361,20 @@ async def mpiexec(d: Directory, cmd: Union[str, Callable],
             else:
                 await process.communicate()
             
-            f.write(f'\nelapsed: {(time()-time_start)/60:.2f}\n')
+            time_exit = time()
+
+            # time when the first rank started (reported by pypers.core.main)
+            if fid != 'mpiexec' and d.has(f'{fid}.start'):
+                time_start = min(float(t) for t in d.readlines(f'{fid}.start') if t)
+
+            f.write(f'\nqueue: {(time_dispatch-time_request)/60:.2f}')
+            f.write(f'\nlaunch: {(time_start-time_dispatch)/60:.2f}')
+            f.write(f'\nelapsed: {(time_exit-time_start)/60:.2f}\n')
+            trace.complete(name, 'mpiexec', run_start, nnodes=nnodes, cwd=d.rel())
+
+        server.count('mpiexec_total')
+        server.count('mpiexec_seconds_total', time_exit - time_start)
+        server.count('node_seconds_total', nnodes * (time_exit - time_dispatch))
 
         # catch error
         errcls = ResubmitJob if resubmit else RuntimeError
@@ -116,25 +384,34 @@ async def mpiexec(d: Directory, cmd: Union[str, Callable],
 
         if process.returncode:
             raise errcls(f'{cmd}\nexit code: {process.returncode}')
+
+        if fid != 'mpiexec':
+            _cleanup(d, fid)
     
     except Exception as e:
         error = e
     
+    # save time spent in each stage to current task
+    if task := current_task.get():
+        if time_dispatch:
+            task.record('queue', time_dispatch - time_request)
+
+        if time_start:
+            task.record('launch', time_start - time_dispatch)
+        
+        if time_exit:
+            task.record('run', time_exit - time_start)
+            task.record('post', time() - time_exit)
+
     # clear entry
     if lock in _pending:
         del _pending[lock]
     
     if lock in _running:
-        del _running[lock]
+        _release(lock)
     
-    # sort entries by their node number
-    pendings = sorted(_pending.items(), key=lambda item: item[1], reverse=True)
-
-    # execute tasks if resource is available
-    for lock, nnodes in pendings:
-        if _dispatch(lock, nnodes):
-            del _pending[lock]
-            lock.release()
+    # execute pending tasks if resource is available
+    _schedule()
 
     if error:
         raise error
@@ -1,6 +1,18 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pypers import Task
+
+
 class ResubmitJob(Exception):
     """Resubmit job when raised."""
 
 
 # dictionary for storing global values
 cache = {}
+
+# task being executed in current asyncio context
+current_task: ContextVar[Optional[Task]] = ContextVar('current_task', default=None)
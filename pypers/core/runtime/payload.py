@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pickle
+from typing import Any, IO
+
+
+def _detached(cls: type) -> Any:
+    """Create an empty object of a workspace class (state is restored by pickle)."""
+    return cls.__new__(cls)
+
+
+def _none():
+    return None
+
+
+class Pickler(pickle.Pickler):
+    """Pickler that detaches workspaces from the workflow tree.
+        A workspace is saved as a read-only copy of its state and its parent workspaces without child nodes,
+        so that keys are resolved as in the main process while siblings and descendants are not saved.
+        Keys of parent workspaces are saved in full, the keys a function reads through its parents are not known before it runs.
+        Tasks are saved as None."""
+    def reducer_override(self, obj: Any):
+        from pypers.core.workflow.workspace import Workspace
+        from pypers.core.workflow.task import Task
+        from pypers.utils.slots import getstate
+
+        if isinstance(obj, Workspace):
+            state = getstate(obj, obj._defaults, obj._transient)
+            state.pop('_pruned', None)
+
+            # state is saved after the object is memorized, so that keys can refer to the workspace itself
+            return _detached, (type(obj),), {**state, '_nodes': [], '_frozen': True}
+
+        if isinstance(obj, Task):
+            return _none, ()
+
+        return NotImplemented
+
+
+def dump(f: IO[bytes], *objs: Any) -> int:
+    """Save objects with detached workspaces, returns the number of bytes written."""
+    start = f.tell()
+
+    # objects are loaded with separate pickle.load() calls, so they must not share memo
+    for obj in objs:
+        Pickler(f).dump(obj)
+
+    return f.tell() - start
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+from io import BytesIO
+from contextvars import copy_context
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional, Literal
+
+
+# execution mode of a task function (event loop, thread pool or local process pool)
+Mode = Literal['loop', 'thread', 'process']
+
+# thread pool for synchronous task functions
+_threads: Optional[ThreadPoolExecutor] = None
+
+# process pool for synchronous task functions (job.process_workers processes, default to number of CPUs)
+_processes: Optional[ProcessPoolExecutor] = None
+
+
+def _call(func: Callable):
+    """Call a function and wait for the coroutine it returns."""
+    from inspect import iscoroutine
+
+    if iscoroutine(result := func()):
+        return asyncio.run(result)
+
+    return result
+
+
+def _call_payload(data: bytes):
+    """Load config and function saved by payload.dump() and call the function."""
+    import pickle
+    from pypers.core.runtime.misc import cache
+
+    f = BytesIO(data)
+    cache['config'] = pickle.load(f)
+    _call(pickle.load(f))
+
+
+async def call(func: Callable, mode: Mode) -> Any:
+    """Call a synchronous function in a thread or in a process without blocking the event loop.
+        Returns the result of functions called in a thread, functions called in a process receive
+        detached workspaces (see payload.py), cannot modify the job and return nothing."""
+    global _threads, _processes
+
+    loop = asyncio.get_running_loop()
+
+    if mode == 'thread':
+        if _threads is None:
+            _threads = ThreadPoolExecutor(thread_name_prefix='task')
+
+        # keep context variables (e.g. current task) in the thread
+        return await loop.run_in_executor(_threads, partial(copy_context().run, _call, func))
+
+    elif mode == 'process':
+        from multiprocessing import get_context
+        from pypers.core.config import getcfg, getconfig
+        from pypers.core.runtime import payload
+
+        if _processes is None:
+            # forking a process with running threads is unsafe, spawned processes import __main__ again
+            # (jobs started with pypers.core.main are safe, scripts calling run() need a __name__ check)
+            _processes = ProcessPoolExecutor(getcfg('job', 'process_workers'), get_context('spawn'))
+
+        f = BytesIO()
+        payload.dump(f, getconfig(), func)
+        await loop.run_in_executor(_processes, _call_payload, f.getvalue())
+
+    else:
+        raise ValueError(f'unknown execution mode {mode}')
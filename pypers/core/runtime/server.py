@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import asyncio
+from os import path, remove
+from collections import defaultdict
+from typing import Dict, Tuple, Coroutine, Any
+
+from pypers.core.config import getcfg
+from pypers.core.runtime.misc import cache
+
+
+# Prometheus-style counters
+counters: Dict[str, float] = defaultdict(float)
+
+
+def count(key: str, value: float = 1):
+    """Increase a counter."""
+    counters[key] += value
+
+
+def _queue() -> dict:
+    """Node counts of pending and running MPI tasks."""
+    from pypers.core.runtime.executor import _pending, _running, nodes_in_use
+
+    return {
+        'pending': len(_pending),
+        'pending_nodes': sum(req.nnodes for req in _pending.values()),
+        'running': len(_running),
+        'running_nodes': nodes_in_use(),
+        'nnodes': getcfg('job', 'nnodes')
+    }
+
+
+def _tasks() -> list:
+    """Elapsed time and prober output of running tasks."""
+    from pypers.core.runtime import console
+
+    tasks = []
+
+    for task in console._monitoring:
+        tasks.append({'name': task.name, 'level': task.level, 'elapsed': task.elapsed, 'progress': console.progress(task)})
+
+    return tasks
+
+
+def _metrics() -> str:
+    """Counters and gauges in Prometheus text format."""
+    lines = []
+
+    def add(name: str, kind: str, value: float):
+        lines.append(f'# TYPE pypers_{name} {kind}')
+        lines.append(f'pypers_{name} {value}')
+
+    for key, value in sorted(counters.items()):
+        add(key, 'counter', value)
+
+    queue = _queue()
+    add('tasks_running', 'gauge', len(_tasks()))
+    add('mpiexec_pending', 'gauge', queue['pending'])
+    add('mpiexec_running', 'gauge', queue['running'])
+    add('nodes_pending', 'gauge', queue['pending_nodes'])
+    add('nodes_running', 'gauge', queue['running_nodes'])
+    add('nodes_total', 'gauge', queue['nnodes'] or 0)
+
+    return '\n'.join(lines) + '\n'
+
+
+def _respond(target: str) -> Tuple[str, str, str]:
+    """Get status code, content type and body of a request."""
+    from pypers.core.runtime import status
+
+    if target == '/metrics':
+        return '200 OK', 'text/plain; version=0.0.4', _metrics()
+
+    if target in ('/', '/status'):
+        body = status.current(cache['job']) if 'job' in cache else None
+
+    elif target == '/queue':
+        body = _queue()
+
+    elif target == '/tasks':
+        body = _tasks()
+
+    else:
+        return '404 Not Found', 'text/plain', f'{target} not found\n'
+
+    return '200 OK', 'application/json', json.dumps(body)
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve an HTTP GET request."""
+    try:
+        request = (await reader.readline()).decode().split()
+
+        # skip headers
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+
+        if len(request) < 2 or request[0] != 'GET':
+            code, ctype, body = '405 Method Not Allowed', 'text/plain', 'only GET is supported\n'
+
+        else:
+            code, ctype, body = _respond(request[1].split('?')[0])
+
+        data = body.encode()
+        writer.write(f'HTTP/1.0 {code}\r\nContent-Type: {ctype}\r\nContent-Length: {len(data)}\r\n\r\n'.encode() + data)
+        await writer.drain()
+
+    finally:
+        writer.close()
+
+
+async def serve(main: Coroutine[Any, Any, Any]):
+    """Execute main coroutine while exposing job status
+        through job.status_socket (Unix socket) or job.status_port (localhost HTTP)."""
+    server = None
+
+    if sock := getcfg('job', 'status_socket'):
+        if path.exists(sock):
+            remove(sock)
+
+        server = await asyncio.start_unix_server(_handle, sock)
+
+    elif port := getcfg('job', 'status_port'):
+        server = await asyncio.start_server(_handle, '127.0.0.1', port)
+
+    try:
+        return await main
+
+    finally:
+        if server:
+            server.close()
+            await server.wait_closed()
+
+            if sock and path.exists(sock):
+                remove(sock)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+from os import replace, getpid
+from typing import Optional, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pypers import Node, Task
+
+
+# file containing the status of running job
+status_file = 'job.status.json'
+
+# snapshot of main job, updated by task transitions (see update())
+_tree: Optional[dict] = None
+
+# main job of the maintained snapshot
+_root: Optional[Node] = None
+
+# value of node._layout when the maintained snapshot is built
+_layout = -1
+
+# entry of each node in the maintained snapshot by node id
+_entries: Dict[int, dict] = {}
+
+# maintained snapshot changed since status file is written
+_dirty = False
+
+
+def reset():
+    """Discard the maintained snapshot (e.g. before running another job in the same process)."""
+    global _tree, _root, _layout, _dirty
+
+    _tree = _root = None
+    _layout = -1
+    _entries.clear()
+    _dirty = False
+
+
+def _fill(entry: dict, task: Task, probe: bool):
+    """Set execution state, times and progress of a task entry."""
+    from pypers.core.workflow.node import Node
+    from pypers.core.runtime import console
+
+    entry['state'] = Node.state.fget(task) # type: ignore
+    entry['starttime'] = task.starttime
+    entry['endtime'] = task.endtime
+
+    if timings := task.timings.get(task.name):
+        entry['timings'] = timings
+    
+    else:
+        entry.pop('timings', None)
+
+    # progress from prober
+    if probe:
+        progress = task.probe()
+
+    else:
+        progress = console.progress(task) if task.running else None
+
+    if isinstance(progress, float) and 0 <= progress <= 1:
+        entry['progress'] = f'{int(progress * 100)}%'
+
+    elif isinstance(progress, str):
+        entry['progress'] = progress
+    
+    else:
+        entry.pop('progress', None)
+
+
+def snapshot(node: Node, probe: bool = False, level: int = 0, entries: Optional[Dict[int, dict]] = None) -> dict:
+    """Compact status of a node tree (name, state, level, timings), entries of nodes are saved to entries if given."""
+    from pypers.core.workflow.node import Node
+    from pypers.core.workflow.task import Task
+
+    entry = {'name': node.name, 'state': Node.state.fget(node), 'level': level} # type: ignore
+
+    if entries is not None:
+        entries[id(node)] = entry
+
+    if isinstance(node, Task):
+        _fill(entry, node, probe)
+
+    else:
+        entry['concurrent'] = getattr(node, '_concurrent')
+        entry['nodes'] = [snapshot(child, probe, level + 1, entries) for child in node] # type: ignore
+
+    return entry
+
+
+def current(node: Node) -> dict:
+    """Snapshot of main job, rebuilt only when nodes are added or removed."""
+    global _tree, _root, _layout, _dirty
+
+    from pypers.core.workflow import node as _node
+
+    if _tree is None or node is not _root or _layout != _node._layout:
+        _entries.clear()
+        _tree = snapshot(node, entries=_entries)
+        _root = node
+        _layout = _node._layout
+        _dirty = True
+
+    return _tree
+
+
+def update(task: Task):
+    """Update the entry of a task and the states of its parent workspaces in the maintained snapshot."""
+    global _dirty
+
+    from pypers.core.workflow.node import Node
+
+    if (entry := _entries.get(id(task))) is None:
+        return
+
+    _fill(entry, task, False)
+    node = task.parent
+
+    while node is not None and (entry := _entries.get(id(node))) is not None:
+        entry['state'] = Node.state.fget(node) # type: ignore
+        node = node.parent
+
+    _dirty = True
+
+
+def render(entry: dict, verbose: bool = False) -> str:
+    """Structure and execution status of a node snapshot."""
+    def fmt(e: dict):
+        name = e['name']
+
+        if state := e.get('progress') or e['state']:
+            name += f' ({state})'
+        
+        if verbose and (timings := e.get('timings')):
+            name += ' [' + ', '.join(f'{key} {val/60:.2f}min' for key, val in timings.items()) + ']'
+
+        return name
+
+    nodes = entry['nodes']
+    stat = fmt(entry)
+
+    if not verbose:
+        stat = stat.split(' ')[0]
+
+    def idx(j):
+        if entry['concurrent']:
+            return '- '
+
+        return '0' * (len(str(len(nodes) + 1)) - len(str(j + 1))) + str(j + 1) + ') '
+
+    collapsed = False
+
+    for i, e in enumerate(nodes):
+        stat += '\n' + idx(i)
+        state = e['state']
+
+        if not verbose and (state == 'done' or (collapsed and state not in ('running', 'failed', 'paused'))):
+            stat += fmt(e)
+
+        else:
+            collapsed = True
+
+            if 'nodes' in e:
+                stat += '\n  '.join(render(e, verbose).split('\n'))
+
+            else:
+                stat += fmt(e)
+
+    return stat
+
+
+def render_timings(entry: dict) -> str:
+    """Time spent in MPI queue wait, launch, run and post-processing, aggregated by task name."""
+    timings: Dict[str, Dict[str, float]] = {}
+
+    def collect(e: dict):
+        if 'nodes' in e:
+            for child in e['nodes']:
+                collect(child)
+        
+        elif 'timings' in e:
+            if e['name'] not in timings:
+                timings[e['name']] = {}
+
+            for key, val in e['timings'].items():
+                timings[e['name']][key] = timings[e['name']].get(key, 0.0) + val
+
+    collect(entry)
+
+    if len(timings) == 0:
+        return ''
+
+    stat = '\n\nMPI time (min)       queue    launch       run      post'
+
+    for name, stages in timings.items():
+        stat += f'\n{name[:16]:16}' + ''.join(f'{stages.get(key, 0.0) / 60:10.2f}' for key in ('queue', 'launch', 'run', 'post'))
+    
+    return stat
+
+
+def write(node: Node):
+    """Save the snapshot of main job if it changed."""
+    global _dirty
+
+    tree = current(node)
+
+    if _dirty:
+        # write to a temporary file first so that readers never see a partial file
+        tmp = f'{status_file}.{getpid()}'
+
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(tree))
+
+        replace(tmp, status_file)
+        _dirty = False
+
+
+def read(src: str = status_file) -> dict:
+    """Load the snapshot of a job."""
+    with open(src, 'r') as f:
+        return json.load(f)
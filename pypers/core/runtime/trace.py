@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import json
+import asyncio
+from os import getpid
+from time import time
+from heapq import heappush, heappop
+from contextlib import contextmanager
+from typing import Optional, List, Dict, Any, IO
+
+from pypers.core.config import getcfg
+
+
+# file containing trace events (Chrome trace event format)
+trace_file = 'trace.json'
+
+# opened trace file
+_file: Optional[IO] = None
+
+# asyncio task ids mapped to trace thread ids
+_tids: Dict[int, int] = {}
+
+# trace thread ids of finished asyncio tasks, reused by new tasks
+_free: List[int] = []
+
+
+def reset():
+    """Close trace file and clear thread ids (e.g. before running another job in the same process)."""
+    global _file
+
+    if _file is not None:
+        _file.close()
+        _file = None
+
+    _tids.clear()
+    _free.clear()
+
+
+def enabled() -> bool:
+    """Whether tracing is enabled in config.toml."""
+    return bool(getcfg('job', 'trace'))
+
+
+def _release(task: asyncio.Task):
+    """Free the trace thread id of a finished asyncio task."""
+    if (tid := _tids.pop(id(task), None)) is not None:
+        heappush(_free, tid)
+
+
+def _tid() -> int:
+    """Trace thread id of current asyncio task."""
+    try:
+        task = asyncio.current_task()
+
+    except RuntimeError:
+        task = None
+
+    if id(task) not in _tids:
+        _tids[id(task)] = heappop(_free) if _free else len(_tids)
+
+        if task is not None:
+            task.add_done_callback(_release)
+
+    return _tids[id(task)]
+
+
+def _emit(event: dict):
+    """Append an event to trace file."""
+    global _file
+
+    if _file is None:
+        from os import path
+
+        new = not path.exists(trace_file)
+        _file = open(trace_file, 'a')
+
+        # closing bracket is optional in Chrome trace format, so that events can be appended
+        if new:
+            _file.write('[\n')
+
+    _file.write(json.dumps(event) + ',\n')
+    _file.flush()
+
+
+def now() -> float:
+    """Current time in microseconds."""
+    return time() * 1e6
+
+
+def complete(name: str, cat: str, start: float, **args: Any):
+    """Record a span that started at `start` and ends now."""
+    if enabled():
+        _emit({'name': name, 'cat': cat, 'ph': 'X', 'ts': start, 'dur': now() - start,
+            'pid': getpid(), 'tid': _tid(), 'args': args})
+
+
+def counter(name: str, **values: float):
+    """Record counter values (e.g. number of nodes in use)."""
+    if enabled():
+        _emit({'name': name, 'ph': 'C', 'ts': now(), 'pid': getpid(), 'args': values})
+
+
+@contextmanager
+def span(name: str, cat: str, **args: Any):
+    """Record the execution of a code block."""
+    start = now()
+
+    try:
+        yield
+
+    finally:
+        complete(name, cat, start, **args)
+
+
+def load(src: str = trace_file) -> List[dict]:
+    """Load events from trace file."""
+    with open(src, 'r') as f:
+        text = f.read().strip()
+
+    if text.endswith(','):
+        text = text[:-1]
+
+    if not text.endswith(']'):
+        text += ']'
+
+    return json.loads(text)
+
+
+def _critical_path(spans: List[dict]) -> List[dict]:
+    """Chain of task spans that determines total execution time (last finisher first)."""
+    path = []
+    remaining = sorted(spans, key=lambda e: e['ts'] + e['dur'])
+
+    while remaining:
+        last = remaining.pop()
+        path.append(last)
+
+        # the latest span that ended before current span started
+        remaining = [e for e in remaining if e['ts'] + e['dur'] <= last['ts'] + 1e3]
+
+    path.reverse()
+
+    return path
+
+
+def summarize(events: List[dict], nnodes: Optional[int] = None) -> str:
+    """Summary of critical path and node utilization."""
+    tasks = [e for e in events if e.get('ph') == 'X' and e.get('cat') == 'task']
+    counters = sorted((e for e in events if e.get('ph') == 'C' and e['name'] == 'nodes'), key=lambda e: e['ts'])
+
+    if len(tasks) == 0:
+        return 'no task recorded'
+
+    t0 = min(e['ts'] for e in tasks)
+    t1 = max(e['ts'] + e['dur'] for e in tasks)
+    lines = [f'wall time: {(t1 - t0) / 6e7:.2f}min, {len(tasks)} tasks']
+
+    # time spent in each task name
+    totals: Dict[str, List[float]] = {}
+
+    for e in tasks:
+        totals.setdefault(e['name'], []).append(e['dur'])
+
+    lines.append('\ntime by task (count, total, mean):')
+
+    for name, durs in sorted(totals.items(), key=lambda item: sum(item[1]), reverse=True)[:20]:
+        lines.append(f'  {name}: {len(durs)}, {sum(durs) / 6e7:.2f}min, {sum(durs) / len(durs) / 6e7:.2f}min')
+
+    # critical path
+    lines.append('\ncritical path:')
+
+    for e in _critical_path(tasks):
+        lines.append(f'  {(e["ts"] - t0) / 6e7:8.2f}min  {e["dur"] / 6e7:8.2f}min  {e["args"].get("path", e["name"])}')
+
+    # node utilization
+    if counters:
+        nnodes = nnodes or max(e['args'].get('total', 0) for e in counters)
+        used = 0.0
+        idle = 0.0
+        starving = 0.0
+
+        for e, e2 in zip(counters, counters[1:] + [{'ts': t1}]):
+            dt = max(0.0, e2['ts'] - e['ts'])
+            running = e['args'].get('running', 0)
+            used += running * dt
+
+            if running == 0:
+                idle += dt
+
+            elif running < (nnodes or 0) and e['args'].get('pending', 0) == 0:
+                starving += dt
+
+        lines.append('')
+
+        if nnodes:
+            lines.append(f'node utilization: {used / nnodes / (t1 - t0) * 100:.1f}% of {nnodes} nodes')
+
+        lines.append(f'no node in use: {idle / 6e7:.2f}min')
+        lines.append(f'partially used with empty queue: {starving / 6e7:.2f}min')
+
+    return '\n'.join(lines)
+
@@ -1,19 +1,30 @@
 from __future__ import annotations
 
 import pickle
-import toml
+from sys import intern
 from os import path, fsync
 from glob import glob
 from subprocess import check_call
 from typing import Any, List, Optional, Union, Callable, Literal, Iterable
 
+from pypers.utils.slots import getstate, setstate
+
 
 class Directory:
+    __slots__ = ('_cwd',)
+
     # path to root directory
     _cwd: str
 
     def __init__(self, cwd: str = '.'):
-        self._cwd = path.normpath(cwd)
+        # paths are repeated across workflow nodes (e.g. per-event solver directories)
+        self._cwd = intern(path.normpath(cwd))
+    
+    def __getstate__(self):
+        return getstate(self)
+    
+    def __setstate__(self, state: dict):
+        setstate(self, state)
     
     def __eq__(self, d: Directory):
         return self.abs() == d.abs()
@@ -127,6 +138,8 @@ class Directory:
                 return pickle.load(fb)
         
         elif ext == 'toml':
+            import toml
+
             with open(self.rel(src), 'r') as f:
                 return toml.load(f)
         
@@ -145,6 +158,8 @@ class Directory:
                 pickle.dump(obj, fb)
         
         elif ext == 'toml':
+            import toml
+
             with open(self.rel(dst), 'w') as f:
                 toml.dump(obj, f)
         
@@ -152,7 +167,12 @@ class Directory:
             raise TypeError(f'Directory.dump() only supports pickle and toml ({dst})')
 
     async def mpiexec(self, cmd: Union[str, Callable], nprocs: int = 1,
-        cpus_per_proc: int = 1, gpus_per_proc: int = 0, walltime: Optional[Union[float, str]] = None, resubmit: bool = False):
+        cpus_per_proc: int = 1, gpus_per_proc: int = 0, walltime: Optional[Union[float, str]] = None, resubmit: bool = False,
+        priority: Optional[float] = None, bundle: bool = False):
+        """Run command or function with MPI, tasks with higher priority are dispatched first
+            (default priority is the remaining downstream work of the calling task).
+            Serial functions with bundle=True are launched together with other bundled functions,
+            one function per rank, so they must not use MPI themselves."""
         from pypers.core.runtime.executor import mpiexec
         
-        await mpiexec(self, cmd, nprocs, cpus_per_proc, gpus_per_proc, walltime, resubmit)
+        await mpiexec(self, cmd, nprocs, cpus_per_proc, gpus_per_proc, walltime, resubmit, priority, bundle)
@@ -4,21 +4,41 @@ import asyncio
 from abc import ABC, abstractmethod
 from os import chdir, path
 from sys import argv
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, Dict, Tuple, Any, TYPE_CHECKING
 
-from pypers.core.runtime import console
+from pypers.core.runtime import console, status, server, trace
 from pypers.core.runtime.misc import cache
-from pypers.core.config import getarg, hasarg, getsys
+from pypers.core.config import Config, getarg, hasarg, getsys
+from pypers.utils.slots import getstate, setstate
 
 
 if TYPE_CHECKING:
     from pypers import Workspace
 
 
+# incremented when nodes are added or removed, or working directory changes
+_layout = 0
+
+
+def relayout():
+    """Discard cached paths and levels of all nodes."""
+    global _layout
+    _layout += 1
+
+
 class Node(ABC):
-    """Base class of Workspace and Task, can be executed or submitted."""
+    """Base class of Workspace and Task, can be executed or submitted.
+        Subclasses store their state in slots (Workspace and Directory cannot both have non-empty slots)."""
+    __slots__ = ()
+
+    # default values of slots (also used for attributes missing in job.pickle written by older versions)
+    _defaults: Dict[str, Any] = {'parent': None, '_cached_level': None}
+
+    # slots that are not saved to job.pickle
+    _transient: Tuple[str, ...] = ('_cached_level',)
+
     # parent node
-    parent: Optional[Workspace] = None
+    parent: Optional[Workspace]
 
     # exceptions occured during execution (not including InsuffifientTime)
     error: Optional[Exception]
@@ -35,6 +55,9 @@ class Node(ABC):
     # node name
     name: str
 
+    # value of _layout and parent level count when level is computed
+    _cached_level: Optional[Tuple[int, int]]
+
     @abstractmethod
     def reset(self):
         """Reset execution state."""
@@ -43,6 +66,12 @@ class Node(ABC):
     async def execute(self):
         """Execute self."""
 
+    def __getstate__(self):
+        return getstate(self, self._defaults, self._transient)
+    
+    def __setstate__(self, state: dict):
+        setstate(self, state, self._defaults)
+
     def __str__(self):
         name = self.name
 
@@ -54,6 +83,8 @@ class Node(ABC):
     def _focus(self):
         """Set self as main job and save as job.pickle."""
         from pypers import basedir as d
+        from pypers.core.workflow import workspace
+
         if 'job' in cache and cache['job'] is not self:
             raise RuntimeError(f'another job is running ({cache["job"]})')
         
@@ -127,9 +158,11 @@ class Node(ABC):
                         config['path'][key] = d.abs(val)
                 
                 d.dump(config, path.join(cwd, 'config.toml'))
-                cache['config'] = config
+                cache['config'] = Config(config)
+                workspace.invalidate()
             
             chdir(cwd)
+            relayout()
 
         self.save()
     
@@ -143,7 +176,8 @@ class Node(ABC):
     def run(self):
         """Call self.execute() with asyncio."""
         self._focus()
-        asyncio.run(self.execute())
+        console.reset()
+        asyncio.run(server.serve(self.execute()))
         self.save()
         
     def submit(self):
@@ -163,9 +197,13 @@ class Node(ABC):
         while True:
             # save job only if it belongs to the main workflow
             if node is cache['job']:
+                server.count('checkpoints_total')
+
                 if sync:
                     # write immediately
-                    d.dump(cache['job'], 'job.pickle')
+                    with trace.span('save', 'checkpoint'):
+                        d.dump(cache['job'], 'job.pickle')
+                        status.write(cache['job'])
                     
                 elif 'saving' in cache:
                     # write after 1s
@@ -174,7 +212,11 @@ class Node(ABC):
                 else:
                     # write and block writing for 1s
                     cache['saving'] = 1
-                    d.dump(cache['job'], 'job.pickle')
+
+                    with trace.span('save', 'checkpoint'):
+                        d.dump(cache['job'], 'job.pickle')
+                        status.write(cache['job'])
+
                     asyncio.create_task(self._block())
                 
                 return
@@ -186,14 +228,45 @@ class Node(ABC):
             node = node.parent
 
     @property
-    def level(self):
-        """Parent level count."""
+    @abstractmethod
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Time spent in MPI queue wait, launch, run and post-processing, aggregated by task name."""
+
+    @property
+    @abstractmethod
+    def remaining(self) -> int:
+        """Number of unfinished tasks in self."""
+
+    @property
+    def downstream(self) -> int:
+        """Number of unfinished tasks that can only start after self."""
         node = self
-        level = 0
+        n = 0
 
-        while node.parent is not None:
-            node = node.parent
-            level += 1
+        while (parent := node.parent) is not None:
+            if not parent._concurrent:
+                # sequential nodes after current node
+                after = False
+
+                for sibling in parent:
+                    if after:
+                        n += sibling.remaining
+                    
+                    elif sibling is node:
+                        after = True
+
+            node = parent
+        
+        return n
+
+    @property
+    def level(self):
+        """Parent level count."""
+        if (cached := self._cached_level) is not None and cached[0] == _layout:
+            return cached[1]
+        
+        level = 0 if self.parent is None else self.parent.level + 1
+        self._cached_level = (_layout, level)
 
         return level
     
@@ -1,17 +1,28 @@
+from sys import intern
 from time import time
 from asyncio import iscoroutine
-from typing import Callable, Optional, Union
+from contextvars import Context
+from typing import Callable, Optional, Union, Dict, Any
 from traceback import format_exc
 
-from pypers.utils.func import get_name
-from pypers.core.runtime import console
-from pypers.core.runtime.misc import ResubmitJob
+from pypers.utils.func import get_name, get_mode
+from pypers.utils.slots import setstate
+from pypers.core.runtime import console, server, trace, pools, status
+from pypers.core.runtime.misc import ResubmitJob, current_task
 
 from .node import Node
 
 
 class Task(Node):
     """A wrapper of function call."""
+    __slots__ = ('parent', '_cached_level', '_name', '_func', '_prober', '_starttime', '_endtime', '_exception',
+        '_timings', '_priority', '_mode', '_tails')
+
+    _defaults = {**Node._defaults, '_prober': None, '_starttime': None, '_endtime': None, '_exception': None,
+        '_timings': None, '_priority': None, '_mode': None, '_tails': None}
+
+    _transient = (*Node._transient, '_tails')
+
     # task display name
     _name: str
 
@@ -22,24 +33,64 @@ class Task(Node):
     _prober: Optional[Callable[..., Union[str, float]]]
 
     # time when function is called
-    _starttime: Optional[float] = None
+    _starttime: Optional[float]
 
     # time when function ends
-    _endtime: Optional[float] = None
+    _endtime: Optional[float]
 
     # exception during function execution
-    _exception: Optional[Exception] = None
+    _exception: Optional[Exception]
+
+    # time spent in MPI queue wait, launch, run and post-processing
+    _timings: Optional[Dict[str, float]]
+
+    # priority of MPI tasks, None for using remaining downstream work
+    _priority: Optional[float]
+
+    # where function is executed ('loop', 'thread' or 'process'), None for using runs_in() of function
+    _mode: Optional[pools.Mode]
+
+    # incremental log readers of prober while task is running (see pypers.utils.specfem.tail)
+    _tails: Optional[Dict[str, Any]]
 
-    def __init__(self, func: Callable, name: Optional[str] = None, prober: Optional[Callable] = None):
+    def __init__(self, func: Callable, name: Optional[str] = None, prober: Optional[Callable] = None,
+        priority: Optional[float] = None, mode: Optional[pools.Mode] = None):
+        setstate(self, {}, self._defaults)
         self._func = func
-        self._name = name or get_name(func)
+        self._name = intern(name or get_name(func))
         self._prober = prober
+        self._priority = priority
+        self._mode = mode
     
     def reset(self):
         """Clear execution state."""
-        self._starttime = None
-        self._endtime = None
-        self._exception = None
+        self._transition(None, None, None)
+        self._timings = None
+        self._tails = None
+
+    def _transition(self, starttime: Optional[float], endtime: Optional[float], exception: Optional[Exception]):
+        """Set execution state and update the task counters of parent workspaces."""
+        phase = self._phase
+        self._starttime = starttime
+        self._endtime = endtime
+        self._exception = exception
+
+        if self.parent and phase != self._phase:
+            self.parent._count(phase, -1)
+            self.parent._count(self._phase, 1)
+
+        status.update(self)
+
+    def _getcounts(self) -> Dict[str, int]:
+        """Number of tasks in each execution phase."""
+        return {self._phase: 1}
+    
+    def record(self, key: str, seconds: float):
+        """Add time spent in an execution stage (queue, launch, run or post)."""
+        if self._timings is None:
+            self._timings = {}
+        
+        self._timings[key] = self._timings.get(key, 0.0) + seconds
 
     async def execute(self):
         """Call function."""
@@ -47,17 +98,25 @@ class Task(Node):
         
         # initialize
         self.reset()
-        self._starttime = time()
+        self._transition(time(), None, None)
         self.save(False)
+        server.count('tasks_started_total')
+        token = current_task.set(self)
         
         try:
-            if iscoroutine(result := self._func()):
+            if (mode := self.mode) != 'loop':
+                # synchronous function that would block the event loop
+                await pools.call(self._func, mode)
+
+            elif iscoroutine(result := self._func()):
                 await result
 
-            self._endtime = time()
+            self._transition(self._starttime, time(), None)
+            server.count('tasks_finished_total')
         
         except Exception as e:
-            self._exception = e
+            self._transition(self._starttime, None, e)
+            server.count('tasks_failed_total')
 
             if isinstance(e, ResubmitJob):
                 console.log(e.args[0])
@@ -65,9 +124,17 @@ class Task(Node):
             else:
                 console.error(format_exc())
         
+        current_task.reset(token)
+        server.count('task_seconds_total', time() - self._starttime)
+
+        if trace.enabled():
+            trace.complete(self.name, 'task', self._starttime * 1e6,
+                path=self.parent.rel(self.name) if self.parent else self.name, state=self.state)
+        
         self.save(False)
 
         console.unlink(self)
+        self._tails = None
     
     @property
     def error(self) -> Optional[Exception]:
@@ -82,6 +149,17 @@ class Task(Node):
         """Exception occurred during execution."""
         return self._exception
 
+    @property
+    def _phase(self) -> str:
+        """Execution phase ('pending', 'running', 'done', 'failed' or 'paused')."""
+        if self._exception is not None:
+            return 'paused' if isinstance(self._exception, ResubmitJob) else 'failed'
+        
+        if self._starttime is None:
+            return 'pending'
+        
+        return 'running' if self._endtime is None else 'done'
+
     @property
     def done(self) -> bool:
         """Task exited successfully."""
@@ -98,20 +176,82 @@ class Task(Node):
         return self._name
     
     @property
-    def state(self) -> Optional[str]:
-        """Execution state."""
+    def remaining(self) -> int:
+        """Number of unfinished tasks in self."""
+        return 0 if self.done else 1
+
+    @property
+    def priority(self) -> float:
+        """Priority of MPI tasks called by self."""
+        if self._priority is not None:
+            return self._priority
+        
+        return float(self.downstream)
+
+    @property
+    def mode(self) -> pools.Mode:
+        """Where function is executed (event loop, thread pool or local process pool)."""
+        return self._mode or get_mode(self._func) # type: ignore
+
+    @property
+    def has_prober(self) -> bool:
+        """Task has a function to check status."""
+        return self._prober is not None
+
+    @property
+    def starttime(self) -> Optional[float]:
+        """Time when function is called."""
+        return self._starttime
+
+    @property
+    def endtime(self) -> Optional[float]:
+        """Time when function ends."""
+        return self._endtime
+
+    @property
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Time spent in MPI queue wait, launch, run and post-processing."""
+        return {self.name: dict(self._timings)} if self._timings else {}
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        """Execution time in seconds."""
+        if self._starttime is None:
+            return None
+        
+        if self._endtime is None:
+            return time() - self._starttime
+        
+        return self._endtime - self._starttime
+
+    def probe(self) -> Union[str, float, None]:
+        """Call prober to get task progress (see console.probe())."""
+        return console.probe(self)
+
+    def _probe(self) -> Union[str, float, None]:
+        """Call prober if task is running."""
         if self.running and self._prober:
             try:
-                progress = self._prober()
+                # prober state is kept by the task being probed
+                ctx = Context()
+                ctx.run(current_task.set, self)
+
+                return ctx.run(self._prober)
             
             except:
                 pass
-            
-            else:
-                if isinstance(progress, float) and 0 <= progress <= 1:
-                    return f'{int(progress * 100)}%'
+        
+        return None
+    
+    @property
+    def state(self) -> Optional[str]:
+        """Execution state."""
+        progress = self.probe()
+
+        if isinstance(progress, float) and 0 <= progress <= 1:
+            return f'{int(progress * 100)}%'
 
-                elif isinstance(progress, str):
-                    return progress
+        elif isinstance(progress, str):
+            return progress
             
         return super().state
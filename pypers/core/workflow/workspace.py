@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Optional, List, Union, Callable, Any
+from os import path
+from typing import Optional, List, Dict, Union, Callable, Literal, Any, cast
 from collections import namedtuple
 
 from pypers.core.config import getcfg, hasarg
-from pypers.core.runtime import console
+from pypers.core.runtime import console, status
 from pypers.core.runtime.misc import cache
+from pypers.utils.slots import getstate, setstate
 
+from . import node as _node
 from .task import Task
 from .node import Node
 from .directory import Directory
@@ -21,8 +24,45 @@ def field(default: Any = None, required: bool = False) -> Any:
     return Field(default, required)
 
 
+# placeholder for keys that are not found
+_missing = object()
+
+# shared initial properties and assigned properties of workspaces that have none (replaced before assignment)
+_empty: dict = {}
+
+# execution phases of tasks
+_phases = ('pending', 'running', 'done', 'failed', 'paused')
+
+# incremented when config changes
+_generation = 0
+
+
+def invalidate(ws: Optional[Workspace] = None):
+    """Discard resolved keys of a workspace and its descendants (of all workspaces if ws is None)."""
+    global _generation
+
+    if ws is None:
+        _generation += 1
+        return
+    
+    stack = [ws]
+
+    while stack:
+        node = stack.pop()
+        node._resolved_gen = -1
+        stack.extend(child for child in node._nodes if isinstance(child, Workspace))
+
+
 class Workspace(Directory, Node):
     """A wrapper of Directory to execute tasks."""
+    __slots__ = ('parent', '_cached_level', '_concurrent', '_nodes', '_kwargs', '_dict', '_resolved', '_resolved_gen',
+        '_frozen', '_cached_path', '_counts', '_pruned')
+
+    _defaults = {**Node._defaults, '_kwargs': _empty, '_dict': _empty, '_resolved': None, '_resolved_gen': -1,
+        '_frozen': False, '_cached_path': None, '_counts': None, '_pruned': None}
+
+    _transient = (*Node._transient, '_resolved', '_resolved_gen', '_cached_path', '_counts')
+
     # execute task concurrently
     _concurrent: bool
 
@@ -35,13 +75,32 @@ class Workspace(Directory, Node):
     # assigned properties
     _dict: dict
 
+    # keys resolved from parents or config.toml
+    _resolved: Optional[dict]
+
+    # value of _generation when _resolved is filled (-1 if state of self or a parent workspace changed)
+    _resolved_gen: int
+
+    # detached copy sent to MPI processes (read-only)
+    _frozen: bool
+
+    # value of node._layout, relative path and absolute path when paths are computed
+    _cached_path: Optional[tuple]
+
+    # number of descendant tasks in each execution phase, None if not counted yet (e.g. loaded from job.pickle)
+    _counts: Optional[Dict[str, int]]
+
+    # number of tasks and timings of child nodes removed by prune()
+    _pruned: Optional[dict]
+
     def __init__(self, cwd: str = '.', kwargs: Optional[dict] = None, concurrent: bool = False):
         super().__init__(cwd)
+        setstate(self, {}, self._defaults)
 
         self._nodes = []
         self._concurrent = concurrent
-        self._kwargs = kwargs or {}
-        self._dict = {}
+        self._kwargs = kwargs or _empty
+        self._counts = dict.fromkeys(_phases, 0)
     
     def __len__(self):
         return len(self._nodes)
@@ -53,43 +112,36 @@ class Workspace(Directory, Node):
         if isinstance(key, int):
             return self._nodes[key]
         
-        if key in self._dict:
-            return self._dict[key]
-        
-        if key in self._kwargs:
-            return self._kwargs[key]
-        
-        if self.parent:
-            return self.parent[key]
-        
-        if (val := getcfg('workspace', key)) is not None:
+        if (val := self._lookup(key)) is not _missing:
             return val
         
         return None
     
     def __setitem__(self, key: str, val):
         """Set state in current directory."""
+        if self._frozen:
+            raise RuntimeError(f'cannot set {key} of {self.rel()}: workspace is a detached copy in MPI process')
+
+        if self._dict is _empty:
+            self._dict = {}
+
         self._dict[key] = val
+        invalidate(self)
     
     def __delitem__(self, key: str):
         """Delete a state."""
         del self._dict[key]
+        invalidate(self)
     
     def __contains__(self, key):
-        if key in self._dict or key in self._kwargs or getcfg('workspace', key) is not None:
-            return True
-        
-        if self.parent:
-            return key in self.parent
-        
-        return False
+        return self._lookup(key) is not _missing
     
     def __getattribute__(self, key: str):
         val = super().__getattribute__(key)
 
         if isinstance(val, Field):
-            if key in self:
-                return self[key]
+            if (found := self._lookup(key)) is not _missing:
+                return found
             
             if val.required:
                 raise TypeError(f'required field {key} for <{self}> is missing')
@@ -98,6 +150,39 @@ class Workspace(Directory, Node):
         
         return val
     
+    def __getstate__(self):
+        return getstate(self, self._defaults, self._transient)
+    
+    def __setstate__(self, state: dict):
+        setstate(self, state, self._defaults)
+    
+    def _lookup(self, key: str) -> Any:
+        """Get a key from self, parents or config.toml in a single pass, returns _missing if not found.
+            Keys from parents and config.toml are memorized until self, a parent workspace or config changes."""
+        if key in self._dict:
+            return self._dict[key]
+        
+        if key in self._kwargs:
+            return self._kwargs[key]
+        
+        if self._resolved_gen != _generation:
+            self._resolved = {}
+            self._resolved_gen = _generation
+        
+        resolved = cast(dict, self._resolved)
+
+        if key not in resolved:
+            if self.parent is not None:
+                resolved[key] = self.parent._lookup(key)
+            
+            elif (val := getcfg('workspace', key)) is not None:
+                resolved[key] = val
+            
+            else:
+                resolved[key] = _missing
+        
+        return resolved[key]
+    
     def __setattr__(self, key: str, val: Any):
         if hasattr(self, key) and isinstance(super().__getattribute__(key), Field):
             self[key] = val
@@ -105,6 +190,31 @@ class Workspace(Directory, Node):
         else:
             super().__setattr__(key, val)
     
+    def _getcounts(self) -> Dict[str, int]:
+        """Number of descendant tasks in each execution phase."""
+        if self._counts is None:
+            counts = dict.fromkeys(_phases, 0)
+
+            for node in self._nodes:
+                for phase, n in cast(Any, node)._getcounts().items():
+                    counts[phase] += n
+            
+            if self._pruned:
+                counts['done'] += self._pruned['tasks']
+            
+            self._counts = counts
+        
+        return self._counts
+    
+    def _count(self, phase: str, n: int):
+        """Add n tasks of an execution phase to self and parents."""
+        node: Optional[Workspace] = self
+
+        # parents of an uncounted workspace are also uncounted, they count their children when first needed
+        while node is not None and node._counts is not None:
+            node._counts[phase] += n
+            node = node.parent
+    
     def _get_unfinished(self, exclude: List[Node] = []):
         """Get nodes that are not finished."""
         nodes = []
@@ -115,17 +225,33 @@ class Workspace(Directory, Node):
         
         return nodes
     
+    def _paths(self) -> tuple:
+        """Relative and absolute paths of self, cached until nodes are moved or working directory changes."""
+        if (cached := self._cached_path) is None or cached[0] != _node._layout:
+            rel = self.parent.rel(self._cwd) if self.parent is not None else super().rel()
+            cached = self._cached_path = (_node._layout, rel, path.abspath(rel))
+        
+        return cached
+    
     def rel(self, *paths: str) -> str:
         """Get relative path of a sub directory."""
-        if self.parent:
-            return self.parent.rel(self._cwd, *paths)
+        if paths:
+            return path.normpath(path.join(self._paths()[1], *paths))
         
-        return super().rel(*paths)
+        return self._paths()[1]
     
-    def add(self, node: Union[Node, Callable], name: Optional[str] = None, prober: Optional[Callable] = None):
+    def abs(self, *paths: str) -> str:
+        """Get absolute path of a sub directory."""
+        if paths:
+            return path.normpath(path.join(self._paths()[2], *paths))
+        
+        return self._paths()[2]
+    
+    def add(self, node: Union[Node, Callable], name: Optional[str] = None, prober: Optional[Callable] = None,
+        priority: Optional[float] = None, mode: Optional[Literal['loop', 'thread', 'process']] = None):
         """Add a child Workspace or task."""
         if callable(node):
-            node = Task(node, name, prober)
+            node = Task(node, name, prober, priority, mode)
 
         if node.parent:
             raise RuntimeError(f'{node} being added to multiple places')
@@ -133,21 +259,63 @@ class Workspace(Directory, Node):
         node.parent = self
 
         self._nodes.append(node)
+        _node.relayout()
+
+        if isinstance(node, Workspace):
+            invalidate(node)
+
+        if self._counts is not None:
+            for phase, n in cast(Any, node)._getcounts().items():
+                self._count(phase, n)
     
+    def truncate(self, n: int):
+        """Delete child nodes after the first n nodes (files are kept)."""
+        for node in self._nodes[n:]:
+            if self._counts is not None:
+                for phase, k in cast(Any, node)._getcounts().items():
+                    self._count(phase, -k)
+            
+            node.parent = None
+
+            if isinstance(node, Workspace):
+                invalidate(node)
+        
+        del self._nodes[n:]
+        _node.relayout()
+
     def clear(self, keep_first: bool = True):
         """Delete all child nodes (except the first node)."""
-        if keep_first:
-            del self._nodes[1:]
-        
-        else:
-            self._nodes.clear()
+        self.truncate(1 if keep_first else 0)
+
+        if self._pruned:
+            self._count('done', -self._pruned['tasks'])
+            self._pruned = None
         
-        self._dict.clear()
+        self._dict = _empty
+        invalidate(self)
 
         if self.rel() != '.':
             self.rm()
             self.mkdir()
     
+    def prune(self):
+        """Replace child nodes with a summary (number of tasks and timings) if all tasks are finished,
+            so that finished parts of a large workflow are not kept in memory and job.pickle (cannot be rewound)."""
+        if not self._nodes or not self.done:
+            return
+
+        self._pruned = {'tasks': self._getcounts()['done'], 'timings': self.timings}
+
+        for node in self._nodes:
+            node.parent = None
+
+            if isinstance(node, Workspace):
+                invalidate(node)
+        
+        self._nodes = []
+        _node.relayout()
+        invalidate(self)
+    
     def reset(self):
         """Reset task."""
         self.rewind(len(self))
@@ -180,53 +348,46 @@ class Workspace(Directory, Node):
 
             else:
                 # execute nodes in sequence
-                node = nodes[0]
-                await node.execute()
+                nodes = nodes[:1]
+                await nodes[0].execute()
 
-                if node.exception:
-                    break
+            if getcfg('job', 'prune'):
+                for node in nodes:
+                    if isinstance(node, Workspace):
+                        node.prune()
+
+            if not self._concurrent and nodes[0].exception:
+                break
         
     @property
     def error(self) -> Optional[Exception]:
-        """Errors in child nodes other than ResubmitJob."""
-        errors = []
-
-        for node in self._get_unfinished():
-            if node.error:
-                errors.append(node.error)
-
-        if len(errors):
-            return RuntimeError(f'{len(errors)} errors.')
+        """Errors in descendant tasks other than ResubmitJob."""
+        if n := self._getcounts()['failed']:
+            return RuntimeError(f'{n} errors.')
         
         return None
 
     @property
     def exception(self) -> Optional[Exception]:
-        """Errors in self or child nodes."""
-        exceptions = []
-
-        for node in self._get_unfinished():
-            if node.exception:
-                exceptions.append(node.exception)
+        """Errors in descendant tasks."""
+        counts = self._getcounts()
 
-        if len(exceptions):
-            return Exception(f'{len(exceptions)} exceptions.')
+        if n := counts['failed'] + counts['paused']:
+            return Exception(f'{n} exceptions.')
         
         return None
     
     @property
     def done(self) -> bool:
-        """All nodes exited successfully."""
-        return len(self._get_unfinished()) == 0
+        """All descendant tasks exited successfully."""
+        counts = self._getcounts()
+
+        return counts['done'] == sum(counts.values())
     
     @property
     def running(self) -> bool:
-        """If any child node is running."""
-        for node in self._get_unfinished():
-            if node.running:
-                return True
-        
-        return False
+        """If any descendant task is running."""
+        return self._getcounts()['running'] > 0
     
     @property
     def name(self) -> str:
@@ -234,35 +395,38 @@ class Workspace(Directory, Node):
         return getcfg('job', 'name') if self.rel() == '.' else self.rel().split('/')[-1]
     
     @property
-    def info(self):
-        """Structure and execution status."""
-        stat = str(self)
-        verbose = hasarg('v')
+    def remaining(self) -> int:
+        """Number of unfinished tasks in self."""
+        counts = self._getcounts()
 
-        if not verbose:
-            stat = stat.split(' ')[0]
+        return sum(counts.values()) - counts['done']
 
-        def idx(j):
-            if self._concurrent:
-                return '- '
+    @property
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Time spent in MPI queue wait, launch, run and post-processing, aggregated by task name."""
+        timings: Dict[str, Dict[str, float]] = {}
 
-            return '0' * (len(str(len(self) + 1)) - len(str(j + 1))) + str(j + 1) + ') '
-            
-        collapsed = False
+        entries = [node.timings for node in self]
+
+        if self._pruned:
+            entries.append(self._pruned['timings'])
 
-        for i, node in enumerate(self):
-            stat += '\n' + idx(i)
+        for entry in entries:
+            for name, stages in entry.items():
+                if name not in timings:
+                    timings[name] = {}
 
-            if not verbose and (node.done or (collapsed and not node.running and not node.exception)):
-                stat += str(node)
+                for key, val in stages.items():
+                    timings[name][key] = timings[name].get(key, 0.0) + val
         
-            else:
-                collapsed = True
-                
-                if isinstance(node, Workspace):
-                    stat += '\n  '.join(node.info.split('\n'))
-                
-                else:
-                    stat += str(node)
+        return timings
+
+    @property
+    def info(self):
+        """Structure and execution status."""
+        stat = status.render(entry := status.snapshot(self, True), hasarg('v'))
+
+        if hasarg('v'):
+            stat += status.render_timings(entry)
         
         return stat
@@ -1,5 +1,22 @@
-from .catalog import catalogdir, get_catalog, get_events, get_stations, is_rotated, has_station
-from .process import process
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .catalog import catalogdir, get_catalog, get_events, get_stations, is_rotated, has_station
+    from .process import process
+
+
+# submodules are imported when an exported name is first accessed (process imports obspy)
+__getattr__ = lazy(__name__, {
+    'catalogdir': '.catalog',
+    'get_catalog': '.catalog',
+    'get_events': '.catalog',
+    'get_stations': '.catalog',
+    'is_rotated': '.catalog',
+    'has_station': '.catalog',
+    'process': '.process'
+})
 
 
 __all__ = [
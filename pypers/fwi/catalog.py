@@ -1,10 +1,27 @@
+from os import path
 from typing import Optional, Dict, Tuple
 
 from pypers import Directory, getpath, cache
 
 
+class CatalogDirectory(Directory):
+    """Directory of catalog files, its location is read from config.toml when used instead of at import."""
+    __slots__ = ()
+
+    def __init__(self):
+        pass
+
+    def __reduce__(self):
+        # location is resolved again by the process that loads the object
+        return CatalogDirectory, ()
+
+    @property
+    def _cwd(self) -> str: # type: ignore
+        return path.normpath(getpath('catalog'))
+
+
 # directory containing catalog files
-catalogdir = Directory(getpath('catalog'))
+catalogdir = CatalogDirectory()
 
 
 def get_catalog() -> dict:
@@ -6,6 +6,8 @@ from obspy.clients.fdsn.mass_downloader import GlobalDomain, Restrictions, MassD
 from pyasdf import ASDFDataSet
 
 from pypers import Workspace, basedir as d
+from pypers.utils.func import runs_in
+from pypers.utils.storage import asdf_options
 
 
 def download_event(event: str):
@@ -33,6 +35,7 @@ def download_event(event: str):
     )
 
 
+@runs_in('process')
 def convert(event: str):
     dst = f'raw_obs/{event}.raw_obs.h5'
     tmp = f'tmp/{event}.raw_obs.h5'
@@ -43,7 +46,7 @@ def convert(event: str):
     e = read_events(f'events/{event}')[0]
 
     # convert to ASDF
-    with ASDFDataSet(d.abs(tmp), mode='w', mpi=False, compression=None) as ds:
+    with ASDFDataSet(d.abs(tmp), mode='w', mpi=False, **{'compression': None, **asdf_options()}) as ds:
         ds.add_quakeml(e)
         
         stations = set()
@@ -106,7 +109,7 @@ def download_catalog():
     ws.mkdir('tmp')
 
     ws.add(ws1 := Workspace('download'))
-    ws.add(ws2 := Workspace('convert'))
+    ws.add(ws2 := Workspace('convert', concurrent=True))
 
     for event in d.ls('events'):
         ws1.add(partial(download_event, event), event)
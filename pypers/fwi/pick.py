@@ -1,25 +1,29 @@
+from __future__ import annotations
+
 from functools import partial
+from typing import TYPE_CHECKING
 import json
 
 import numpy as np
-from asdfy import ASDFAccessor
-from scipy.fftpack import fft, fftfreq
 
 from pypers import Workspace, getpath, getcfg, basedir as d
 from pypers.utils.asdf import asdf_task
 
 from .process import process_observed, process_synthetic
 
-
-dt = getcfg('workspace', 'dt')
-period_range = getcfg('workspace', 'period_range')
+if TYPE_CHECKING:
+    from asdfy import ASDFAccessor
 
 
 def pick(event: str, obs_acc: ASDFAccessor, syn_acc: ASDFAccessor):
+    from scipy.fftpack import fft, fftfreq
+
     obs_stream = process_observed(obs_acc)
     syn_stream = process_synthetic(syn_acc)
     
     if obs_stream and syn_stream:
+        dt = getcfg('workspace', 'dt')
+        period_range = getcfg('workspace', 'period_range')
         selected = []
 
         for cmp in ['R', 'T', 'Z']:
@@ -3,12 +3,10 @@ from __future__ import annotations
 from sys import stderr
 from typing import Optional, List, Dict, TYPE_CHECKING
 
-from obspy import Stream, Trace, Inventory
-from asdfy import ASDFAccessor
-from pytomo3d.signal.process import flex_cut_stream, rotate_stream
-
 if TYPE_CHECKING:
     import numpy as np
+    from obspy import Stream, Inventory
+    from asdfy import ASDFAccessor
 
 
 def detrend(stream: Stream, taper: Optional[float] = None):
@@ -20,8 +18,57 @@ def detrend(stream: Stream, taper: Optional[float] = None):
         stream.taper(max_percentage=None, max_length=taper*60)
 
 
+def detrend_array(data: np.ndarray) -> np.ndarray:
+    """Remove linear trend and mean of a trace array (same as detrend() without taper)."""
+    from scipy.signal import detrend as _detrend
+
+    return _detrend(_detrend(data, type='linear'), type='constant')
+
+
+def resample_array(data: np.ndarray, sampling_rate: float, dt: float) -> np.ndarray:
+    """Resample a trace array to sampling interval dt with the Fourier method of obspy Trace.resample()
+        (Hann window in frequency domain, spectrum linearly interpolated, no lowpass filter)."""
+    import numpy as np
+    from scipy.signal import get_window
+    from scipy.fftpack import rfft, irfft
+
+    npts = len(data)
+    num = max(int(npts / (sampling_rate / (1 / dt))), 1)
+
+    # real and imaginary parts of the spectrum (scipy.fftpack packing), computed in the precision of data
+    x = rfft(data)
+    x = np.insert(x, 1, x.dtype.type(0))
+
+    if npts % 2 == 0:
+        x = np.append(x, [0])
+
+    x_r = x[::2]
+    x_i = x[1::2]
+    window = np.fft.ifftshift(get_window('hann', npts))[:npts // 2 + 1]
+    x_r *= window
+    x_i *= window
+
+    # interpolate spectrum at new frequencies
+    f = 1 / (npts * (1 / sampling_rate)) * np.arange(0, npts // 2 + 1, dtype=np.int32)
+    n_large_f = num // 2 + 1
+    large_f = 1 / num * (1 / dt) * np.arange(0, n_large_f, dtype=np.int32)
+    large_y = np.zeros(2 * n_large_f)
+    large_y[::2] = np.interp(large_f, f, x_r)
+    large_y[1::2] = np.interp(large_f, f, x_i)
+
+    large_y = np.delete(large_y, 1)
+
+    if num % 2 == 0:
+        large_y = np.delete(large_y, -1)
+
+    return irfft(large_y) * (num / npts)
+
+
 def select(acc: ASDFAccessor, duration: Optional[float] = None):
     """Select 3 components from Stream."""
+    from obspy import Stream
+    from pytomo3d.signal.process import flex_cut_stream
+
     stream = acc.stream
 
     # cut stream based on event time
@@ -45,6 +92,8 @@ def select(acc: ASDFAccessor, duration: Optional[float] = None):
 
 def rotate_frequencies(group: Dict[str, np.ndarray], fslots: Dict[str, List[int]], parameters: dict, station: str, inv: Inventory):
     import numpy as np
+    from obspy import Stream, Trace
+    from pytomo3d.signal.process import rotate_stream
     
     from pypers.fwi.catalog import locate_events
 
@@ -97,6 +146,8 @@ def process(acc: ASDFAccessor,
     duration: Optional[float] = None, nt: Optional[int] = None, dt: Optional[float] = None,
     taper: Optional[float] = None, remove_response: bool = False, rotate: bool = False):
     """Process observed stream."""
+    from pytomo3d.signal.process import rotate_stream
+
     try:
         if (stream := select(acc, duration)) is None:
             return
@@ -5,8 +5,10 @@ import numpy as np
 
 from pypers import Workspace
 from pypers.fwi.catalog import get_events, get_stations, locate_events, locate_stations
+from pypers.utils.func import runs_in
 
 
+@runs_in('process')
 def _save_locations(ws: Workspace):
     """Save the locations of events and stations for weight computation."""
     event_loc = locate_events()
@@ -86,9 +88,9 @@ def compute_weightings(event_weighting: Optional[float], station_weighting: Opti
 
     for event in get_events():
         func = partial(_compute_weightings, ws, f'station.{event}', station_weighting)
-        subws.add(partial(ws.mpiexec, func, walltime='compute_weightings'), event)
+        subws.add(partial(ws.mpiexec, func, walltime='compute_weightings', bundle=True), event)
 
     # move results to catalog director
-    ws.add(partial(ws.mv, 'weightings', dst), 'export_result')
+    ws.add(partial(ws.mv, 'weightings', dst), 'export_result', mode='thread')
 
     return ws
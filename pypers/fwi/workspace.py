@@ -17,8 +17,8 @@ class ASDFKwargs(TypedDict, total=False):
     # output file
     dst: Optional[str]
 
-    # type of input data for func
-    input_type: Literal['stream', 'trace', 'auxiliary']
+    # type of input data for func ('array' reads waveforms as NumPy arrays, see pypers.utils.asdf_processor)
+    input_type: Literal['stream', 'trace', 'auxiliary', 'array']
 
     # tag of ASDF input data
     input_tag: Optional[str]
@@ -73,6 +73,9 @@ class FWIKwargs(TypedDict, total=False):
 
     # save forward wavefield for adjoint simulation
     save_forward: bool
+
+    # reuse output traces of identical simulations
+    cache_traces: bool
     
     # radius for smoothing kernels
     smooth_kernels: Optional[Union[float, List[float]]]
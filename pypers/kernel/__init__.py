@@ -1,4 +1,16 @@
-from .kernel import Kernel, create_kernel
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .kernel import Kernel, create_kernel
+
+
+# submodules are imported when an exported name is first accessed
+__getattr__ = lazy(__name__, {
+    'Kernel': '.kernel',
+    'create_kernel': '.kernel'
+})
 
 
 __all__ = ['Kernel', 'create_kernel']
@@ -3,10 +3,9 @@ from __future__ import annotations
 from sys import stderr
 from random import seed, sample
 from functools import partial
-from typing import List, Dict, Optional, Union, TYPE_CHECKING
+from typing import List, Dict, Optional, Union, Literal, TYPE_CHECKING
 
 import numpy as np
-from scipy.fftpack import fft, fftfreq
 
 from pypers import Workspace, field, getpath
 from pypers.fwi import catalogdir, get_catalog, get_events, is_rotated, process, has_station
@@ -16,11 +15,42 @@ from pypers.solver import create_solver
 from pypers.misfit import create_misfit
 from pypers.utils.asdf import asdf_task
 from pypers.utils.specfem import merge_stations
+from pypers.utils.func import runs_in
+from pypers.utils.spectra import Spectra, write_spectra, consolidate, dtypes
+from pypers.utils.storage import asdf_options
+from pypers.core.runtime import pools
 
 from .kernel import Kernel
 
 if TYPE_CHECKING:
     from asdfy import ASDFAccessor
+    from pypers.fwi.workspace import ASDFKwargs
+    from pypers.utils.asdf import Waveforms
+    from pypers.utils.asdf_processor import ArrayAccessor
+
+
+def _read_weightings(ampstr: str, fslots: Dict[str, List[int]], nf: int, event_weighting: bool, station_weighting: bool):
+    """Read event and station weightings of each frequency slot from catalog directory."""
+    gamp = np.zeros(nf) if event_weighting else None
+    samp: Dict[str, np.ndarray] = {}
+    event_weightings = catalogdir.load(f'{ampstr}/event.pickle')
+    
+    for event in fslots:
+        if gamp is not None:
+            for idx in fslots[event]:
+                gamp[idx] = event_weightings[event]
+
+        if station_weighting:
+            station_weightings = catalogdir.load(f'{ampstr}/station.{event}.pickle')
+
+            for idx in fslots[event]:
+                for station in station_weightings:
+                    if station not in samp:
+                        samp[station] = np.zeros(nf)
+                    
+                    samp[station][idx] = station_weightings[station]
+    
+    return gamp, samp
 
 
 class Ortho(Kernel):
@@ -87,9 +117,25 @@ class Ortho(Kernel):
     # station geographical weighting
     samp: Optional[dict] = field()
 
+    # save observed frequency components as one matrix per file instead of one ASDF dataset per station channel
+    consolidate_spectra: bool = field(False)
+
+    # storage precision of frequency components ('single' or 'double'), computations are done in double precision
+    precision: Literal['single', 'double'] = field('double')
+
+    @property
+    def _ft_synthetic(self) -> ASDFKwargs:
+        """Processing function of synthetic traces, traces are read as arrays unless rotation is required."""
+        if is_rotated():
+            return {'func': partial(self._ft, None), 'input_type': 'stream'}
+
+        return {'func': self._ft_array, 'input_type': 'array'}
+
     @property
     def freq(self):
         """Frequencies used for encoding."""
+        from scipy.fftpack import fftfreq
+
         return fftfreq(self.nt_se, self.dt)[self.fidx[0]: self.fidx[-1]]
     
     @property
@@ -138,12 +184,12 @@ class Ortho(Kernel):
                 'path_model': getpath('model_true'),
                 'monochromatic_source': True,
                 'save_forward': False,
+                'cache_traces': True,
                 'process_traces': {
                     'dst': self.abs('observed.ft.h5'),
-                    'func': partial(self._ft, None),
-                    'input_type': 'stream',
                     'output_tag': 'FT',
-                    'accessor': True
+                    'accessor': True,
+                    **self._ft_synthetic
                 }
             }))
         
@@ -169,6 +215,7 @@ class Ortho(Kernel):
                         'path_model': getpath('model_true'),
                         'monochromatic_source': False,
                         'save_forward': False,
+                        'cache_traces': True,
                         'process_traces': {
                             'dst': dst,
                             'func': partial(self._ft, event),
@@ -187,6 +234,9 @@ class Ortho(Kernel):
             
             if len(ws):
                 self.add(ws)
+            
+            if self.consolidate_spectra:
+                self.add(self._consolidate_observed)
 
             # get Fourier coefficients from observed traces
             self.add(partial(self.mpiexec, self._encode_observed, walltime='encode_observed'))
@@ -200,10 +250,9 @@ class Ortho(Kernel):
             'save_forward': True,
             'process_traces': {
                 'dst': self.abs('synthetic.ft.h5'),
-                'func': partial(self._ft, None),
-                'input_type': 'stream',
                 'accessor': True,
-                'output_tag': 'FT'
+                'output_tag': 'FT',
+                **self._ft_synthetic
             }
         }))
 
@@ -229,6 +278,7 @@ class Ortho(Kernel):
     def _prepare_frequencies(self):
         """Prepare frequencies and extract frequency components of observed traces."""
         from math import ceil
+        from scipy.fftpack import fftfreq
 
         if self.fidx:
             return
@@ -288,7 +338,7 @@ class Ortho(Kernel):
         cmt = ''
 
         # merge stations into a single station file
-        merge_stations(catalogdir.subdir('stations'), self.abs('SUPERSTATION'), get_catalog())
+        await pools.call(partial(merge_stations, catalogdir.subdir('stations'), self.abs('SUPERSTATION'), get_catalog()), 'thread')
 
         # randomize frequency
         freq = self.freq
@@ -348,36 +398,34 @@ class Ortho(Kernel):
         
         self.write(cmt, 'SUPERSOURCE')
     
-    def _load_weightings(self):
-        nf = len(self.freq)
+    async def _load_weightings(self):
+        """Load geographical weightings of encoded frequency slots."""
+        # pickles are read in a thread, workspace state is set on the event loop
+        gamp, samp = await pools.call(partial(_read_weightings, self.ampstr, self.fslots, len(self.freq),
+            bool(self.event_weighting), bool(self.station_weighting)), 'thread')
 
         if self.event_weighting:
-            self.gamp = np.zeros(nf)
+            self.gamp = gamp
         
         if self.station_weighting:
-            self.samp = {}
-        
-        event_weightings = catalogdir.load(f'{self.ampstr}/event.pickle')
-        
-        for event in self.fslots:
-            if self.event_weighting:
-                for idx in self.fslots[event]:
-                    self.gamp[idx] = event_weightings[event]
-
-            if self.station_weighting:
-                station_weightings = catalogdir.load(f'{self.ampstr}/station.{event}.pickle')
-
-                for idx in self.fslots[event]:
-                    for station in station_weightings:
-                        if station not in self.samp:
-                            self.samp[station] = np.zeros(nf)
-                        
-                        self.samp[station][idx] = station_weightings[station]
+            self.samp = samp
+
+    @runs_in('process')
+    def _consolidate_observed(self):
+        """Convert processed observed traces in catalog directory to consolidated layout."""
+        for event in get_events():
+            fname = f'{self.freqstr}/{event}.ft.h5'
+
+            with Spectra(catalogdir.abs(fname)) as sp:
+                if sp.consolidated:
+                    continue
+            
+            consolidate(catalogdir.abs(fname), catalogdir.abs(f'{fname}.tmp'))
+            catalogdir.mv(f'{fname}.tmp', fname)
 
     async def _encode_observed(self):
         """Prepare observed frequencies."""
         import cmath
-        from pyasdf import ASDFDataSet
 
         # load catalog
         catalog = get_catalog()
@@ -390,6 +438,7 @@ class Ortho(Kernel):
         # encoded traces
         encoded = {}
         freq = self.freq
+        dtype = dtypes[self.precision][0]
 
         for event, slots in self.fslots.items():
             # add empty traces to fill
@@ -398,12 +447,16 @@ class Ortho(Kernel):
                     sta = station.replace('.', '_') + '_MX' + cmp
 
                     if sta not in encoded:
-                        encoded[sta] = np.full(len(freq), np.nan, dtype=complex)
+                        encoded[sta] = np.full(len(freq), np.nan, dtype=dtype)
             
-            with ASDFDataSet(catalogdir.abs(f'{self.freqstr}/{event}.ft.h5'), mode='r', mpi=False) as ds:
+            with Spectra(catalogdir.abs(f'{self.freqstr}/{event}.ft.h5')) as sp:
+                # frequency components of the slots of current event (ASDF or consolidated layout)
+                cols = sorted(slots)
+                traces = sp.columns(cols)
+                icol = {idx: i for i, idx in enumerate(cols)}
+
                 # start time of seismogram relative to event origin time
-                traces = ds.auxiliary_data.FT.list()
-                hdur = ds.events[0].focal_mechanisms[0].moment_tensor.source_time_function.duration / 2
+                hdur = sp.event.focal_mechanisms[0].moment_tensor.source_time_function.duration / 2
                 tshift = 1.5 * hdur
 
                 # source time function of observed data and its frequency component
@@ -436,17 +489,29 @@ class Ortho(Kernel):
                             if not np.isnan(encoded[sta][idx]):
                                 raise RuntimeError(f'duplicate frequency slot {idx}')
 
-                            encoded[sta][idx] = ds.auxiliary_data.FT[sta].data[idx] * pshift
+                            encoded[sta][idx] = traces[sta][icol[idx]] * pshift
 
         # save encoded data
-        with ASDFDataSet(self.abs('observed.ft.h5'), mode='w', mpi=False) as ds:
-            for sta, data in encoded.items():
-                ds.add_auxiliary_data(data, 'FT', sta, {'df': self.df, 'fmin': freq[0], 'fmax': freq[-1]})
+        params = {'df': self.df, 'fmin': freq[0], 'fmax': freq[-1]}
+
+        if self.consolidate_spectra:
+            write_spectra(self.abs('observed.ft.h5'), encoded, dict.fromkeys(encoded, params), dtype=dtype)
+        
+        else:
+            from pyasdf import ASDFDataSet
+
+            with ASDFDataSet(self.abs('observed.ft.h5'), mode='w', mpi=False, **asdf_options()) as ds:
+                for sta, data in encoded.items():
+                    ds.add_auxiliary_data(data.astype(dtype), 'FT', sta, params)
     
     def _ft_syn(self, data: np.ndarray):
+        from scipy.fftpack import fft
+
         return fft(data[self.nt_ts: self.nt_ts + self.nt_se])[self.fidx[0]: self.fidx[-1]]
     
     def _ft_obs(self, data: np.ndarray):
+        from scipy.fftpack import fft
+
         if (nt := self.kf * self.nt_se) > len(data):
             # expand observed data with zeros
             data = np.concatenate([data, np.zeros(nt - len(data))]) # type: ignore
@@ -500,7 +565,9 @@ class Ortho(Kernel):
             'fidx': self.fidx
         }
 
-        # FFT
+        # FFT (frequency components are saved in storage precision)
+        dtype = dtypes[self.precision][0]
+
         if event is None and is_rotated():
             if (inv := acc.inventory) is None or station is None:
                 return
@@ -515,11 +582,60 @@ class Ortho(Kernel):
             output = {}
 
             for cmp, data in output_rtz.items():
-                output[f'MX{cmp}'] = data, params
+                output[f'MX{cmp}'] = data.astype(dtype), params
         
         else:
             for trace in stream:
                 data = self._ft_obs(trace.data) if event else self._ft_syn(trace.data)
-                output[f'MX{trace.stats.component}'] = data, params
+                output[f'MX{trace.stats.component}'] = data.astype(dtype), params
+
+        return output
+
+    def _ft_array(self, acc: ArrayAccessor):
+        """Same as self._ft(None, acc) for synthetic traces in NEZ components, with traces read as arrays."""
+        from pypers.fwi.process import resample_array, detrend_array
+
+        wav: Waveforms = acc.waveforms # type: ignore
+        tag = acc.key[1]
+        cmps = None
+
+        # select 3 components with the same location code (same as pypers.fwi.process.select())
+        for loc in wav.locations(acc.station, tag):
+            # first channel of each component
+            channels = {cha[-1]: cha for cha in reversed(wav.channels(acc.station, tag, loc))}
+
+            if cmps := next((c for c in ('ZNE', 'Z12') if all(cmp in channels for cmp in c)), None):
+                break
+
+        if cmps is None:
+            print('failed to process stream', acc.station)
+            return
+
+        traces = wav.station(acc.station, tag, location=loc)
+        stats = wav.stats(acc.station, tag, loc)
+
+        # the stats of original trace
+        stats0 = next(iter(stats.values()))
+        output = {}
+        params = None
+        dtype = dtypes[self.precision][0]
+
+        for cmp in cmps:
+            cha = channels[cmp]
+            data = detrend_array(resample_array(traces[cha], stats[cha]['sampling_rate'], self.dt))
+
+            if params is None:
+                # Time and frequency parameters
+                params = {
+                    'npts': stats0['npts'],
+                    'delta': stats0['delta'],
+                    'nt': len(data),
+                    'dt': self.dt,
+                    'nt_ts': self.nt_ts,
+                    'nt_se': self.nt_se,
+                    'fidx': self.fidx
+                }
+
+            output[f'MX{cmp}'] = self._ft_syn(data).astype(dtype), params
 
         return output
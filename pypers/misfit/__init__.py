@@ -1,4 +1,17 @@
-from .misfit import Misfit, create_misfit, read_misfit
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .misfit import Misfit, create_misfit, read_misfit
+
+
+# submodules are imported when an exported name is first accessed
+__getattr__ = lazy(__name__, {
+    'Misfit': '.misfit',
+    'create_misfit': '.misfit',
+    'read_misfit': '.misfit'
+})
 
 
 __all__ = ['Misfit', 'create_misfit', 'read_misfit']
@@ -1,10 +1,11 @@
 from functools import partial
-from typing import Optional, Dict, List, cast
+from typing import Optional, Dict, List, Literal, cast
 
 import numpy as np
 
 from pypers import cache
 from pypers.utils.asdf import asdf_task
+from pypers.utils.spectra import Spectra, dtypes
 from pypers.fwi.process import rotate_frequencies
 
 from .misfit import Misfit, field
@@ -33,6 +34,9 @@ class Ortho(Misfit):
     # double difference misfit
     double_difference: bool = field(False)
 
+    # storage precision of adjoint sources ('single' or 'double'), computations are done in double precision
+    precision: Literal['single', 'double'] = field('double')
+
     def setup(self):
         self.clear()
 
@@ -44,28 +48,18 @@ class Ortho(Misfit):
         if self.double_difference:
             self.add(partial(self.mpiexec, self._diff, walltime='encode_observed'))
         
-        # compute misfit / adjoint source
-        self.add(asdf_task((self.path_synthetic, self.path_observed), self.abs('adjoint.h5'), self._adjoint,
+        # compute misfit / adjoint source (observed traces are read with pypers.utils.spectra in either layout)
+        self.add(asdf_task(self.path_synthetic, self.abs('adjoint.h5'), self._adjoint,
             input_type='auxiliary_group', input_tag='FT', accessor=True,
             output_tag='AdjointSources', walltime='compute_misfit'
         ))
     
     def _diff(self):
-        import numpy as np
-        from pyasdf import ASDFDataSet
-
-        with ASDFDataSet(self.path_synthetic, mode='r', mpi=False) as syn_ds, \
-            ASDFDataSet(self.path_observed, mode='r', mpi=False) as obs_ds:
+        with Spectra(self.path_synthetic) as syn_sp, Spectra(self.path_observed) as obs_sp:
             fellows = {}
 
-            syn_aux = syn_ds.auxiliary_data.FT
-            obs_aux = obs_ds.auxiliary_data.FT
-            
-            syn_keys = syn_aux.list()
-            obs_keys = obs_aux.list()
-
-            for key in syn_keys:
-                if key not in obs_keys:
+            for key in syn_sp.keys():
+                if key not in obs_sp:
                     continue
 
                 keypath = key.split('_')
@@ -76,8 +70,8 @@ class Ortho(Misfit):
                     fellows[cha] = {}
 
                 # phase and amplitude difference
-                syn = np.array(syn_aux[key].data)
-                obs = np.array(obs_aux[key].data)
+                syn = np.asarray(syn_sp[key], dtype=complex)
+                obs = np.asarray(obs_sp[key], dtype=complex)
 
                 phase_diff = np.angle(syn / obs)
                 amp_diff = np.abs(syn) / np.abs(obs)
@@ -86,13 +80,17 @@ class Ortho(Misfit):
             
             self.dump(fellows, 'fellows.pickle')
 
-    def _adjoint(self, syn_acc, obs_acc):
+    def _adjoint(self, syn_acc):
         from scipy.fftpack import ifft
         from scipy.signal import resample
+        from pypers.utils.asdf_processor import opened
 
         station = syn_acc.station
         syn_group = syn_acc.auxiliary_group
-        obs_group = obs_acc.auxiliary_group
+
+        # observed traces are opened once per process and closed when processing finishes
+        if (obs_group := opened(self.path_observed, Spectra).station(station)) is None:
+            return None
         
         if self.double_difference and 'fellows' not in cache:
             cache['fellows'] = self.load('fellows.pickle')
@@ -114,9 +112,12 @@ class Ortho(Misfit):
         misfits = {}
 
         for cha in syn_group:
+            if cha not in obs_group:
+                continue
+
             # phase and amplitude difference
-            syn = syn_group[cha].data
-            obs = obs_group[cha].data
+            syn = np.asarray(syn_group[cha].data, dtype=complex)
+            obs = np.asarray(obs_group[cha], dtype=complex)
 
             # empty slots
             nan = np.squeeze(np.where(np.isnan(syn) | np.isnan(obs)))
@@ -151,7 +152,7 @@ class Ortho(Misfit):
             
             else:
                 # single difference measurements
-                phase_diff = np.angle(syn / obs_group[cha].data)
+                phase_diff = np.angle(syn / obs)
                 amp_diff = np.zeros(len(syn))
 
             # apply measurement weightings
@@ -221,6 +222,6 @@ class Ortho(Misfit):
             if npts != nt:
                 adstf = cast(np.ndarray, resample(adstf, num=npts))
             
-            adjs[f'MX{cmp}'] = adstf, {'misfit': misfits[f'MX{cmp}'][1], **params}
+            adjs[f'MX{cmp}'] = adstf.astype(dtypes[self.precision][1]), {'misfit': misfits[f'MX{cmp}'][1], **params}
 
         return adjs
@@ -1,4 +1,16 @@
-from .optimizer import Optimizer, create_optimizer
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .optimizer import Optimizer, create_optimizer
+
+
+# submodules are imported when an exported name is first accessed
+__getattr__ = lazy(__name__, {
+    'Optimizer': '.optimizer',
+    'create_optimizer': '.optimizer'
+})
 
 
 __all__ = ['Optimizer', 'create_optimizer']
@@ -1,4 +1,16 @@
-from .search import Search, create_search
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .search import Search, create_search
+
+
+# submodules are imported when an exported name is first accessed
+__getattr__ = lazy(__name__, {
+    'Search': '.search',
+    'create_search': '.search'
+})
 
 
 __all__ = ['Search', 'create_search']
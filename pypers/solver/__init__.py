@@ -1,4 +1,16 @@
-from .solver import Solver, create_solver
+from typing import TYPE_CHECKING
+
+from pypers.utils.lazy import lazy
+
+if TYPE_CHECKING:
+    from .solver import Solver, create_solver
+
+
+# submodules are imported when an exported name is first accessed
+__getattr__ = lazy(__name__, {
+    'Solver': '.solver',
+    'create_solver': '.solver'
+})
 
 
 __all__ = ['Solver', 'create_solver']
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from os import path, stat, walk
+from hashlib import sha1
+from typing import Optional, TYPE_CHECKING
+
+from pypers import Directory, cache, getpath
+
+if TYPE_CHECKING:
+    from pypers.utils.specfem import Par_file
+
+
+# Par_file entries that do not affect output traces
+_ignored = {'SAVE_FORWARD', 'NTSTEP_BETWEEN_OUTPUT_INFO', 'NTSTEP_BETWEEN_FRAMES', 'MOVIE_SURFACE', 'MOVIE_VOLUME'}
+
+
+def cachedir() -> Optional[Directory]:
+    """Directory of cached solver outputs."""
+    if src := getpath('solver_cache') or getpath('catalog', 'solver_cache'):
+        return Directory(src)
+
+    return None
+
+
+def _update(h, src: str):
+    """Feed the content of a file to hash object."""
+    with open(src, 'rb') as f:
+        while chunk := f.read(1 << 24):
+            h.update(chunk)
+
+
+def hash_model(src: str) -> str:
+    """Hash of a model file or directory (e.g. ADIOS .bp), memorized by size and modification time.
+        Every file of the model is read once per job (about a second per GB), the first solver of a model pays the cost."""
+    src = path.realpath(src)
+    files = []
+
+    if path.isdir(src):
+        for root, _, entries in walk(src):
+            for entry in sorted(entries):
+                files.append(path.join(root, entry))
+
+    else:
+        files.append(src)
+
+    files.sort()
+
+    # signature of model files
+    sig = src + ';' + ';'.join(f'{f}:{(s := stat(f)).st_size}:{s.st_mtime_ns}' for f in files)
+
+    if 'model_hashes' not in cache:
+        cache['model_hashes'] = {}
+
+    if sig not in cache['model_hashes']:
+        h = sha1()
+
+        for f in files:
+            h.update(path.relpath(f, src).encode())
+            _update(h, f)
+
+        cache['model_hashes'][sig] = h.hexdigest()
+
+    return cache['model_hashes'][sig]
+
+
+def getkey(path_model: Optional[str], path_event: str, path_stations: str, pars: Par_file) -> str:
+    """Content-addressed key of a forward simulation."""
+    h = sha1()
+
+    h.update(f'model:{hash_model(path_model) if path_model else ""}\n'.encode())
+
+    for src in (path_event, path_stations):
+        _update(h, src)
+        h.update(b'\n')
+
+    for key in sorted(pars):
+        if key not in _ignored:
+            h.update(f'{key}={pars[key]}\n'.encode())
+
+    return h.hexdigest()
@@ -37,6 +37,9 @@ class Solver(Workspace):
     # save snapshots of forward wavefield
     save_forward: bool = field(False)
 
+    # reuse output traces of identical simulations (only for forward simulation without saving forward wavefield)
+    cache_traces: bool = field(False)
+
     # radius for smoothing kernels
     smooth_kernels: Optional[Union[float, List[float]]] = field()
 
@@ -1,10 +1,16 @@
+from os import rename
+from uuid import uuid4
 from functools import partial
+from typing import Optional, cast
 
 from pypers import Directory, field, getpath, cache
+from pypers.core.runtime import pools
+from pypers.core.runtime.misc import current_task
 from pypers.utils.asdf import asdf_task
-from pypers.utils.specfem import probe_mesher, probe_solver, probe_smoother, getsize, setpars, Par_file
+from pypers.utils.specfem import probe_mesher, probe_solver, probe_smoother, getsize, getpars, setpars, Par_file
 
 from .solver import Solver
+from .cache import cachedir, getkey
 
 
 class Specfem3D_Globe(Solver):
@@ -25,7 +31,7 @@ class Specfem3D_Globe(Solver):
             self.add(partial(self.mpiexec, 'bin/xspecfem3D', nprocs, 1, 1, 'solver_adjoint', True), prober=partial(probe_solver, self))
 
             # move OUTPUT_FILES/kernels.bp to kernels_raw.bp
-            self.add(partial(self.mv, 'OUTPUT_FILES/kernels.bp', 'kernels_raw.bp'), 'move_kernels')
+            self.add(partial(self.mv, 'OUTPUT_FILES/kernels.bp', 'kernels_raw.bp'), 'move_kernels', mode='thread')
 
             # smooth kernels / hessian
             if self.smooth_kernels:
@@ -41,6 +47,31 @@ class Specfem3D_Globe(Solver):
             # link final kernels to kernels.bp
             self.add(self._finalize_adjoint)
 
+        elif self._cacheable():
+            # look up solver cache (hashing the model takes long for large models)
+            self.add(self._check_cache)
+
+        else:
+            self._add_forward(None)
+    
+    async def _check_cache(self):
+        """Link traces of an identical simulation from solver cache or add the tasks of forward simulation."""
+        key = await pools.call(self._cache_key, 'thread')
+
+        # replace the tasks added before the job is rewound to this task (the cache may have been filled since)
+        self.truncate(list(self).index(current_task.get()) + 1)
+        self._add_forward(key)
+
+    def _add_forward(self, key: Optional[str]):
+        """Add the tasks of forward simulation and trace processing (key of output traces in solver cache or None)."""
+        # number of processors to use
+        nprocs = getsize()
+        store = cachedir()
+
+        if key and store and store.has(f'{key}/traces_raw.h5'):
+            # link traces from an identical simulation
+            self.add(partial(self.ln, store.abs(key, 'traces_raw.h5'), 'traces_raw.h5'), 'link_cached')
+
         else:
             # prepare forward simulation
             self.add(self._setup_forward)
@@ -50,18 +81,22 @@ class Specfem3D_Globe(Solver):
             self.add(partial(self.mpiexec, 'bin/xspecfem3D', nprocs, 1, 1, 'solver_forward', True), prober=partial(probe_solver, self))
 
             # move OUTPUT_FILES/synthetic.h5 to traces_raw.h5
-            self.add(partial(self.mv, 'OUTPUT_FILES/synthetic.h5', 'traces_raw.h5'), 'move_traces')
-
-            # process traces
-            if self.process_traces:
-                if 'dst' in self.process_traces:
-                    self.add(asdf_task(self.abs('traces_raw.h5'), **self.process_traces))
-                
-                else:
-                    self.add(asdf_task(self.abs('traces_raw.h5'), self.abs('traces_proc.h5'), **self.process_traces))
-
-            # link final traces to traces.h5
-            self.add(self._finalize_forward)
+            self.add(partial(self.mv, 'OUTPUT_FILES/synthetic.h5', 'traces_raw.h5'), 'move_traces', mode='thread')
+
+            # save traces for identical simulations
+            if key:
+                self.add(partial(self._cache_traces, key), 'cache_traces', mode='thread')
+
+        # process traces
+        if self.process_traces:
+            if 'dst' in self.process_traces:
+                self.add(asdf_task(self.abs('traces_raw.h5'), **self.process_traces))
+            
+            else:
+                self.add(asdf_task(self.abs('traces_raw.h5'), self.abs('traces_proc.h5'), **self.process_traces))
+
+        # link final traces to traces.h5
+        self.add(self._finalize_forward)
     
     def _setup_forward(self):
         # specfem directory warpper
@@ -86,7 +121,10 @@ class Specfem3D_Globe(Solver):
             self.mkdir('DATA/GLL')
             self.ln(self.path_model, 'DATA/GLL/model_gll.bp')
 
-        # update Par_file
+        setpars(self, self._forward_pars())
+
+    def _forward_pars(self) -> Par_file:
+        """Par_file entries for forward simulation."""
         pars: Par_file = {'SIMULATION_TYPE': 1}
 
         if self.save_forward is not None:
@@ -114,7 +152,43 @@ class Specfem3D_Globe(Solver):
         else:
             pars['STEADY_STATE_KERNEL'] = False
 
-        setpars(self, pars)
+        return pars
+
+    def _cacheable(self) -> bool:
+        """Whether output traces are saved to solver cache."""
+        return bool(self.cache_traces and not self.save_forward and cachedir() is not None)
+
+    def _cache_key(self) -> str:
+        """Key of output traces in solver cache."""
+        d = Directory(getpath('specfem'))
+        pars = getpars(d)
+        pars.update(self._forward_pars())
+
+        return getkey(self.path_model,
+            self.path_event or d.abs('DATA/CMTSOLUTION'), self.path_stations or d.abs('DATA/STATIONS'), pars)
+
+    def _cache_traces(self, key: str):
+        """Copy output traces to solver cache."""
+        store = cast(Directory, cachedir())
+
+        if store.has(key):
+            return
+
+        # copy to a temporary directory first to avoid exposing incomplete files
+        tmp = f'.{key}.{uuid4().hex}'
+        store.cp(self.abs('traces_raw.h5'), f'{tmp}/traces_raw.h5')
+        store.dump({
+            'path_model': self.path_model or '',
+            'path_event': self.path_event or '',
+            'path_stations': self.path_stations or ''
+        }, f'{tmp}/key.toml')
+
+        try:
+            # rename fails if another job published the same key first
+            rename(store.abs(tmp), store.abs(key))
+
+        except OSError:
+            store.rm(tmp)
     
     def _setup_adjoint(self):
         # specfem directory for forward simulation
@@ -1,14 +1,145 @@
 from __future__ import annotations
 
-from typing import Union, Iterable, Literal, Optional, TYPE_CHECKING
+from typing import Union, Iterable, Literal, Optional, Dict, List, Tuple, Any, TYPE_CHECKING
 from functools import partial
 
-from pypers import Directory, Task, getsys
+from pypers import Directory, Task, getsys, getcfg
 
 if TYPE_CHECKING:
+    import numpy as np
     from asdfy import ASDFFunction, ASDFProcessor
 
 
+class Waveforms:
+    """Read-only access to waveform arrays of an ASDF file with h5py, without creating ObsPy objects or parsing
+        StationXML. Metadata is limited to npts, delta, sampling_rate and starttime (nanoseconds since epoch)."""
+    # path to ASDF file
+    src: str
+
+    # opened h5py file
+    file: Any
+
+    # datasets of each (station, tag, location), see channels()
+    _channels: Dict[Tuple[str, Optional[str], Optional[str]], Dict[str, str]]
+
+    def __init__(self, src: str):
+        import h5py
+
+        self.src = src
+        self.file = h5py.File(src, 'r')
+        self._channels = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        self.file.close()
+
+    def stations(self) -> List[str]:
+        """Stations with waveform data (e.g. 'II.AAK')."""
+        return list(self.file['Waveforms']) if 'Waveforms' in self.file else []
+
+    def tags(self, station: str) -> List[str]:
+        """Waveform tags of a station."""
+        tags = []
+
+        for name in self.file['Waveforms'][station]:
+            if '__' in name and (tag := name.split('__')[-1]) not in tags:
+                tags.append(tag)
+
+        return tags
+
+    def locations(self, station: str, tag: Optional[str] = None) -> List[str]:
+        """Location codes of a station with given tag (default to first tag) in alphabetical order."""
+        tag = tag or next(iter(self.tags(station)), None)
+
+        # dataset names are <network>.<station>.<location>.<channel>__<starttime>__<endtime>__<tag>
+        return sorted({name.split('__')[0].split('.')[2] for name in self.file['Waveforms'][station] if name.endswith(f'__{tag}')})
+
+    def channels(self, station: str, tag: Optional[str] = None, location: Optional[str] = None) -> Dict[str, str]:
+        """Dataset name of each channel (e.g. 'MXZ') of a station with given tag (default to first tag) and location,
+            the first location code in alphabetical order is used if location is not given and a channel has multiple locations."""
+        if (station, tag, location) not in self._channels:
+            channels = {}
+            tag = tag or next(iter(self.tags(station)), None)
+
+            # dataset names are <network>.<station>.<location>.<channel>__<starttime>__<endtime>__<tag>
+            for name in sorted(self.file['Waveforms'][station]):
+                if name.endswith(f'__{tag}'):
+                    _, _, loc, cha = name.split('__')[0].split('.')
+
+                    if cha not in channels and location in (None, loc):
+                        channels[cha] = name
+
+            self._channels[station, tag, location] = channels
+
+        return self._channels[station, tag, location]
+
+    def _read(self, dataset: Any, mmap: bool) -> np.ndarray:
+        """Read a dataset, memory mapped if requested and the dataset is stored contiguously."""
+        import numpy as np
+
+        if mmap and dataset.chunks is None and (offset := dataset.id.get_offset()) is not None:
+            return np.memmap(self.src, dataset.dtype, 'r', offset, dataset.shape)
+
+        return dataset[()]
+
+    def station(self, station: str, tag: Optional[str] = None, mmap: bool = False,
+        location: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Waveform of each channel of a station."""
+        group = self.file['Waveforms'][station]
+
+        return {cha: self._read(group[name], mmap) for cha, name in self.channels(station, tag, location).items()}
+
+    def stats(self, station: str, tag: Optional[str] = None, location: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Number of samples, sampling interval, sampling rate and start time of each channel of a station."""
+        group = self.file['Waveforms'][station]
+        stats = {}
+
+        for cha, name in self.channels(station, tag, location).items():
+            dataset = group[name]
+            stats[cha] = {
+                'npts': dataset.shape[0],
+                'delta': 1 / dataset.attrs['sampling_rate'],
+                'sampling_rate': float(dataset.attrs['sampling_rate']),
+                'starttime': int(dataset.attrs['starttime'])
+            }
+
+        return stats
+
+    def read(self, stations: Optional[Iterable[str]] = None, tag: Optional[str] = None,
+        dtype: Any = None) -> Tuple[List[str], np.ndarray]:
+        """Read all channels of given stations (default to all stations) into one (channels x npts) array,
+            keys are <network>_<station>_<channel>. Traces must have the same number of samples."""
+        import numpy as np
+
+        datasets = []
+
+        for station in (self.stations() if stations is None else stations):
+            group = self.file['Waveforms'][station]
+
+            for cha, name in self.channels(station, tag).items():
+                datasets.append((f'{station.replace(".", "_")}_{cha}', group[name]))
+
+        if len(set(dataset.shape for _, dataset in datasets)) > 1:
+            raise ValueError(f'traces in {self.src} have different lengths')
+
+        npts = datasets[0][1].shape[0] if datasets else 0
+        data = np.empty((len(datasets), npts), dtype=dtype or (datasets[0][1].dtype if datasets else np.float32))
+
+        for i, (_, dataset) in enumerate(datasets):
+            if dataset.dtype == data.dtype:
+                dataset.read_direct(data, dest_sel=np.s_[i])
+
+            else:
+                data[i] = dataset[()]
+
+        return [key for key, _ in datasets], data
+
+
 def _probe(dst: str):
     """Check the processing status."""
     from os.path import exists, getsize
@@ -34,18 +165,24 @@ async def _run(ap: ASDFProcessor, nprocs: int, walltime: Optional[Union[float, s
 
 
 def asdf_task(src: Union[str, Union[str, Iterable[str]]], dst: Optional[str] = None,
-    func: Optional[ASDFFunction] = None, input_type: Literal['stream', 'trace', 'auxiliary', 'auxiliary_group'] = 'trace',
+    func: Optional[ASDFFunction] = None,
+    input_type: Literal['stream', 'trace', 'auxiliary', 'auxiliary_group', 'array'] = 'trace',
     input_tag: Optional[str] = None, output_tag: Optional[str] = None, accessor: bool = False, pairwise: bool = False,
-    nprocs: Optional[int] = None, name: str = 'process_traces', walltime: Optional[Union[float, str]] = 'process_traces') -> Task:
-    """Create a task that processes ASDF."""
-    from asdfy import ASDFProcessor
+    nprocs: Optional[int] = None, name: str = 'process_traces', walltime: Optional[Union[float, str]] = 'process_traces',
+    storage: Optional[str] = None) -> Task:
+    """Create a task that processes ASDF, output is written with storage profile (default to job.storage).
+        With input_type 'array', func receives the waveforms of a station as NumPy arrays (see ArrayAccessor)."""
     from pypers.core.job import add_error
+    from .asdf_processor import Processor
 
     # default number of processors
     nprocs = nprocs or getsys('cpus_per_node')
 
+    # resolve storage profile before the processor is sent to MPI processes
+    storage = storage or getcfg('job', 'storage')
+
     # create processor object
-    ap = ASDFProcessor(src, dst, func, input_type, input_tag, output_tag, accessor, pairwise, add_error)
+    ap = Processor(src, dst, func, input_type, input_tag, output_tag, accessor, pairwise, add_error, storage)
     task = Task(partial(_run, ap, nprocs, walltime), name, partial(_probe, dst))
 
     # save task reference to determine cwd
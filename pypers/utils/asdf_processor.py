@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from sys import stderr
+from functools import partial
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, Any, Callable, TYPE_CHECKING
+
+from asdfy import ASDFProcessor, ASDFAccessor
+from asdfy.writer import ASDFWriter
+
+from .asdf import Waveforms
+from .storage import asdf_options
+
+if TYPE_CHECKING:
+    import numpy as np
+    from pyasdf import ASDFDataSet
+
+
+# asdfy version whose private methods are overridden by Processor and ArrayAccessor (see tests/test_asdf_processor.py)
+_asdfy_version = '0.1.18'
+
+# files opened once per process by the processing function (e.g. observed spectra), closed when processing finishes
+_opened: Dict[Tuple[Callable, str], Any] = {}
+
+
+def opened(src: str, reader: Callable[[str], Any]) -> Any:
+    """Open a file with a reader class (e.g. Spectra) once per process and share it between the calls of a processing function."""
+    if (reader, src) not in _opened:
+        _opened[reader, src] = reader(src)
+
+    return _opened[reader, src]
+
+
+def _write(writer: ASDFWriter, options: Dict[str, Any]):
+    """Same as ASDFWriter._write() with the compression options of a storage profile
+        (ASDFWriter._write() always writes uncompressed data)."""
+    from pyasdf import ASDFDataSet
+
+    with ASDFDataSet(writer.dst, mode='a', mpi=False, **options) as ds:
+        for waveform, tag in writer._waveform:
+            try:
+                ds.add_waveforms(waveform, tag)
+
+            except Exception:
+                print(waveform, file=stderr)
+                raise
+
+        writer._waveform.clear()
+
+        for path, (data, tag) in writer._auxiliary.items():
+            try:
+                ds.add_auxiliary_data(data=data.data, data_type=tag, path=path, parameters=data.parameters)
+
+            except Exception:
+                print(data, path, file=stderr)
+                raise
+
+        for data in writer._inventory.values():
+            try:
+                ds.add_stationxml(data)
+
+            except Exception:
+                # same as ASDFWriter, invalid station data does not fail the task
+                print(data, file=stderr)
+
+        writer._auxiliary.clear()
+
+
+@dataclass
+class ArrayAccessor(ASDFAccessor):
+    """Accessor of input_type 'array', reads the waveforms of a station as NumPy arrays.
+        Station inventory is not parsed (StationXML is copied to output file as is)."""
+    # waveform reader of self.ds
+    waveforms: Optional[Waveforms] = None
+
+    @property
+    def array(self) -> Dict[str, np.ndarray]:
+        """Waveform of each channel (e.g. 'MXZ')."""
+        return self.waveforms.station(self.station, self.key[1]) # type: ignore
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]: # type: ignore
+        """Number of samples, sampling interval and start time of each channel."""
+        return self.waveforms.stats(self.station, self.key[1]) # type: ignore
+
+    @property
+    def inventory(self):
+        return None
+
+
+@dataclass
+class Processor(ASDFProcessor):
+    """ASDFProcessor that writes output with a storage profile (see storage.py)
+        and supports input_type 'array' (see ArrayAccessor)."""
+    # storage profile of output file (None for job.storage, uncompressed as ASDFWriter if neither is set)
+    storage: Optional[str] = None
+
+    def _check(self):
+        from importlib.metadata import version
+
+        if (installed := version('asdfy')) != _asdfy_version:
+            raise RuntimeError(f'asdfy {installed} is not supported, Processor overrides private methods of asdfy {_asdfy_version}')
+
+        if self.pairwise and not self.accessor:
+            raise ValueError('accessor must be True to enable pairwise processing')
+
+        for j in range(1 if isinstance(self.src, str) else len(list(self.src))):
+            if self._input_type(j) not in ('stream', 'trace', 'auxiliary', 'auxiliary_group', 'array'):
+                raise ValueError('unsupported input type', self.input_type)
+
+    def _copy_meta(self, input_ds: List[ASDFDataSet]):
+        import h5py
+
+        super()._copy_meta(input_ds)
+
+        if self.dst is None:
+            return
+
+        # copy StationXML of array inputs without parsing
+        with h5py.File(self.dst, 'a') as f:
+            for j, ds in enumerate(input_ds):
+                if self._input_type(j) != 'array':
+                    continue
+
+                with h5py.File(ds.filename, 'r') as src:
+                    for station, group in src.get('Waveforms', {}).items():
+                        if 'StationXML' in group and f'Waveforms/{station}/StationXML' not in f:
+                            src.copy(group['StationXML'], f.require_group(f'Waveforms/{station}'))
+
+    def _get_accessors(self, input_ds: List[ASDFDataSet], keys: Dict[str, List[str]]):
+        accessors = super()._get_accessors(input_ds, keys)
+
+        for j, ds in enumerate(input_ds):
+            if self._input_type(j) == 'array':
+                reader = opened(ds.filename, Waveforms)
+
+                for key in keys:
+                    acc = accessors[key][j]
+                    accessors[key][j] = ArrayAccessor(acc.ds, acc.key, waveforms=reader)
+
+        return accessors
+
+    def _process(self, input_ds: List[ASDFDataSet], keys: Dict[str, List[str]], writer: Optional[ASDFWriter] = None):
+        if writer is not None and (options := asdf_options(self.storage)):
+            writer._write = partial(_write, writer, options) # type: ignore
+
+        try:
+            super()._process(input_ds, keys, writer)
+
+        finally:
+            for f in _opened.values():
+                f.close()
+
+            _opened.clear()
@@ -21,3 +21,23 @@ def get_name(func: Callable) -> str:
         return rawfunc.__name__.lstrip('_').rstrip('_')
     
     return ''
+
+
+def runs_in(mode: str):
+    """Decorator that sets where a task function is executed by default ('loop', 'thread' or 'process')."""
+    def decorator(func: Callable) -> Callable:
+        func.__pypers_mode__ = mode # type: ignore
+        return func
+
+    return decorator
+
+
+def get_mode(func: Callable) -> str:
+    """Execution mode set by runs_in(), 'loop' if not set."""
+    rawfunc = func
+
+    # unwrap partial
+    while isinstance(rawfunc, partial):
+        rawfunc = rawfunc.func
+    
+    return getattr(rawfunc, '__pypers_mode__', 'loop')
@@ -0,0 +1,20 @@
+from importlib import import_module
+from typing import Dict, Callable, Any
+
+
+def lazy(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """Create module __getattr__ that imports exported names from submodules when first accessed
+        (exports maps names to submodules relative to package, e.g. {'Kernel': '.kernel'}),
+        a name not defined in its submodule refers to the submodule itself."""
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+
+        module = import_module(exports[name], package)
+        namespace[name] = val = getattr(module, name, module)
+
+        return val
+
+    return __getattr__
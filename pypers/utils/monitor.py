@@ -1,4 +1,22 @@
-from pypers import Directory, hasarg, basedir as d
+from os import path
+
+from pypers.core.config import hasarg
+from pypers.core.runtime import status
+
+
+def info() -> str:
+    """Job status from status file, or from job.pickle for jobs without status file."""
+    if path.exists(status.status_file):
+        stat = status.render(entry := status.read(), hasarg('v'))
+
+        if hasarg('v'):
+            stat += status.render_timings(entry)
+
+        return stat
+
+    from pypers import basedir as d
+
+    return d.load('job.pickle').info
 
 
 if __name__ == '__main__':
@@ -14,11 +32,15 @@ if __name__ == '__main__':
 
             def loop():
                 n = 0
+                mtime = None
+
                 while not ended:
                     if n % 50 == 0:
-                        stdscr.clear()
-                        stdscr.addstr(d.load('job.pickle').info + '\n')
-                        stdscr.refresh()
+                        # redraw only if status file is updated
+                        if not path.exists(status.status_file) or mtime != (mtime := path.getmtime(status.status_file)):
+                            stdscr.clear()
+                            stdscr.addstr(info() + '\n')
+                            stdscr.refresh()
 
                     sleep(0.1)
                     n += 1
@@ -37,4 +59,4 @@ if __name__ == '__main__':
     
     else:
         # print job status
-        print(d.load('job.pickle').info)
+        print(info())
@@ -0,0 +1,53 @@
+from typing import Any, Dict, Tuple, Collection
+
+
+# names of the slots declared by each class and its bases, excluding slots that are not saved
+_slots: Dict[Tuple[type, Collection[str]], Tuple[str, ...]] = {}
+
+# placeholder for unset slots
+_unset = object()
+
+
+def getslots(cls: type, exclude: Collection[str] = ()) -> Tuple[str, ...]:
+    """Names of the slots declared by a class and its bases."""
+    if (cls, exclude) not in _slots:
+        names = []
+
+        for base in reversed(cls.__mro__):
+            for key in base.__dict__.get('__slots__', ()):
+                if key not in ('__dict__', '__weakref__') and key not in exclude and key not in names:
+                    names.append(key)
+
+        _slots[cls, exclude] = tuple(names)
+
+    return _slots[cls, exclude]
+
+
+def getstate(obj: Any, defaults: Dict[str, Any] = {}, exclude: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """Slot values and instance dict of an object for pickling.
+        Unset slots, excluded keys and values identical to their defaults are omitted."""
+    state = dict(getattr(obj, '__dict__', ()))
+
+    for key in getslots(type(obj), exclude):
+        try:
+            # bypass __getattribute__ of subclasses (e.g. field lookup of Workspace)
+            val = object.__getattribute__(obj, key)
+
+        except AttributeError:
+            continue
+
+        if val is not defaults.get(key, _unset):
+            state[key] = val
+
+    return state
+
+
+def setstate(obj: Any, state: Dict[str, Any], defaults: Dict[str, Any] = {}):
+    """Restore state saved by getstate() or the instance dict saved by versions without slots,
+        missing keys are set to their defaults."""
+    for key, val in defaults.items():
+        if key not in state:
+            object.__setattr__(obj, key, val)
+
+    for key, val in state.items():
+        object.__setattr__(obj, key, val)
@@ -1,6 +1,8 @@
-from typing import TypedDict, Optional, List, cast
+from threading import Lock
+from typing import TypedDict, Optional, Callable, List, Dict, cast
 
 from pypers import Directory, cache, getpath
+from pypers.core.runtime.misc import current_task
 
 
 class Par_file(TypedDict, total=False):
@@ -38,48 +40,145 @@ class Par_file(TypedDict, total=False):
     STEADY_STATE_LENGTH_IN_MINUTES: float
 
 
-def probe_mesher(d: Directory) -> float:
-    """Prober of mesher progress."""
-    ntotal = 0
-    nl = 0
+class LogTail:
+    """Incremental reader of a growing log file."""
+    # path to log file
+    src: str
 
-    if not d.has(out_file := 'OUTPUT_FILES/output_mesher.txt'):
-        return 0.0
+    # number of bytes to read when file is opened for the first time (None for reading from beginning)
+    backlog: Optional[int]
+
+    # current file position
+    offset: int = 0
+
+    # file identity (inode) to detect re-created files
+    inode: Optional[int] = None
+
+    # incomplete last line
+    partial: str = ''
+
+    # parser state
+    state: dict
+
+    # lock of file position and parser state held by readlines() and parse() (a task can be probed from multiple threads)
+    lock: Lock
+
+    def __init__(self, src: str, backlog: Optional[int] = None):
+        self.src = src
+        self.backlog = backlog
+        self.state = {}
+        self.lock = Lock()
+
+    def readlines(self) -> List[str]:
+        """Read lines appended since last call."""
+        with self.lock:
+            return self._readlines()
+
+    def parse(self, parser: Callable[[str, dict], None]) -> dict:
+        """Pass the lines appended since last call to a parser that updates parser state, returns a copy of the state."""
+        with self.lock:
+            for line in self._readlines():
+                parser(line, self.state)
+
+            return dict(self.state)
+
+    def _readlines(self) -> List[str]:
+        from os import stat
+
+        try:
+            st = stat(self.src)
+        
+        except FileNotFoundError:
+            return []
+
+        # skip the first line that is likely incomplete
+        skip = False
+
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # file is new or truncated, start over
+            self.inode = st.st_ino
+            self.offset = 0
+            self.partial = ''
+            self.state.clear()
+
+            if self.backlog and st.st_size > self.backlog:
+                self.offset = st.st_size - self.backlog
+                skip = True
+
+        if st.st_size == self.offset:
+            return []
+        
+        with open(self.src, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(st.st_size - self.offset)
+        
+        self.offset += len(data)
+        lines = data.decode(errors='replace').split('\n')
+
+        if skip:
+            lines[0] = ''
+        
+        else:
+            lines[0] = self.partial + lines[0]
+
+        self.partial = lines.pop()
+
+        return lines
+
+
+# lock of the log readers of tasks
+_lock = Lock()
+
+
+def tail(src: str, backlog: Optional[int] = None) -> LogTail:
+    """Get the incremental reader of a log file, kept by the task being probed until it finishes
+        (a new reader is returned if not called by the prober of a task)."""
+    if (task := current_task.get()) is None:
+        return LogTail(src, backlog)
+
+    with _lock:
+        if task._tails is None:
+            task._tails = {}
+
+        if src not in task._tails:
+            task._tails[src] = LogTail(src, backlog)
     
-    lines = d.readlines(out_file)
+        return task._tails[src]
+
 
-    for line in lines:
+def probe_mesher(d: Directory) -> float:
+    """Prober of mesher progress."""
+    def parse(line: str, state: dict):
         if ' out of ' in line:
-            if ntotal == 0:
-                ntotal = int(line.split()[-1]) * 2
+            if state.get('ntotal', 0) == 0:
+                state['ntotal'] = int(line.split()[-1]) * 2
 
-            if nl < ntotal:
-                nl += 1
+            if state.get('nl', 0) < state['ntotal']:
+                state['nl'] = state.get('nl', 0) + 1
 
         if 'End of mesh generation' in line:
-            return 1.0
+            state['done'] = True
+
+    state = tail(d.abs('OUTPUT_FILES/output_mesher.txt')).parse(parse)
 
-    if ntotal == 0:
+    if state.get('done'):
+        return 1.0
+
+    if state.get('ntotal', 0) == 0:
         return 0.0
 
-    return (nl - 1) / ntotal
+    return (state['nl'] - 1) / state['ntotal']
 
 
 def probe_solver(d: Directory) -> float:
     """Prober of solver progress."""
     from math import ceil
 
-    if not d.has(out := 'OUTPUT_FILES/output_solver.txt'):
-        return 0.0
-    
-    lines = d.readlines(out)
-    lines.reverse()
-
-    for line in lines:
+    def parse(line: str, state: dict):
         if 'End of the simulation' in line:
-            return 1.0
+            state['progress'] = 1.0
 
-        if 'We have done' in line:
+        elif 'We have done' in line:
             words = line.split()
             done = False
 
@@ -88,9 +187,13 @@ def probe_solver(d: Directory) -> float:
                     done = True
 
                 elif word and done:
-                    return ceil(float(word)) / 100
+                    state['progress'] = ceil(float(word)) / 100
+                    break
+
+    # only the latest progress is needed, skip the head of an existing log
+    state = tail(d.abs('OUTPUT_FILES/output_solver.txt'), 1 << 16).parse(parse)
 
-    return 0.0
+    return state.get('progress', 0.0)
 
 
 def probe_smoother(d: Directory, hess: bool):
@@ -98,22 +201,21 @@ def probe_smoother(d: Directory, hess: bool):
     kind = 'smooth_' + ('hess' if hess else 'kl')
     ntotal = cache.get(kind)
 
-    if ntotal and d.has(out := f'OUTPUT_FILES/{kind}.txt'):
-        n = 0
+    def parse(line: str, state: dict):
+        if 'Initial residual:' in line:
+            state['n'] = state.get('n', 0) + 1
+        
+        elif 'Iterations' in line:
+            state['niter'] = line.split()[1]
 
-        lines = d.readlines(out)
-        niter = '0'
+    if ntotal:
+        t = tail(d.abs(f'OUTPUT_FILES/{kind}.txt'))
+        state = t.parse(parse)
 
-        for line in lines:
-            if 'Initial residual:' in line:
-                n += 1
-            
-            elif 'Iterations' in line:
-                niter = line.split()[1]
-        
-        n = max(1, n)
+        if t.inode is not None:
+            n = max(1, state.get('n', 0))
 
-        return f'{n}/{ntotal*2} iter{niter}'
+            return f'{n}/{ntotal*2} iter{state.get("niter", "0")}'
 
 
 def getpars(d: Optional[Directory] = None) -> Par_file:
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# storage data types of frequency components and time domain traces for each precision
+dtypes = {'single': (np.complex64, np.float32), 'double': (np.complex128, np.float64)}
+
+
+class Spectra:
+    """Read-only access to frequency components saved as ASDF auxiliary data (one dataset per station channel,
+        e.g. FT/II_AAK_MXZ) or in the consolidated layout (one matrix per file, see write_spectra()).
+        Files are read with h5py, keys are <network>_<station>_<channel>."""
+    # path to HDF5 file
+    src: str
+
+    # opened h5py file
+    file: Any
+
+    # file is in consolidated layout
+    consolidated: bool
+
+    # matrix of frequency components (consolidated layout) or group of auxiliary datasets (ASDF layout)
+    group: Any
+
+    # row index of each key (consolidated layout)
+    rows: Dict[str, int]
+
+    # keys of each station (e.g. 'II.AAK') and their channels
+    channels: Dict[str, List[Tuple[str, str]]]
+
+    def __init__(self, src: str, tag: str = 'FT'):
+        import h5py
+
+        self.src = src
+        self.file = h5py.File(src, 'r')
+        self.consolidated = 'spectra' in self.file
+
+        if self.consolidated:
+            keys = [key.decode() for key in self.file['keys'][()]]
+            self.rows = {key: i for i, key in enumerate(keys)}
+            self.group = self.file['spectra']
+
+        else:
+            self.group = self.file['AuxiliaryData'][tag]
+            keys = list(self.group)
+
+        self.channels = {}
+
+        for key in keys:
+            keypath = key.split('_')
+            station = '.'.join(keypath[:-1])
+
+            if station not in self.channels:
+                self.channels[station] = []
+
+            self.channels[station].append((keypath[-1], key))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __contains__(self, key: str):
+        if self.consolidated:
+            return key in self.rows
+
+        return key in self.group
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        if self.consolidated:
+            return self.group[self.rows[key]]
+
+        return self.group[key][()]
+
+    def close(self):
+        self.file.close()
+
+    def keys(self) -> List[str]:
+        """Keys of all station channels."""
+        if self.consolidated:
+            return list(self.rows)
+
+        return list(self.group)
+
+    def stations(self) -> List[str]:
+        """Stations with at least one channel."""
+        return list(self.channels)
+
+    def station(self, station: str) -> Optional[Dict[str, np.ndarray]]:
+        """Frequency components of each channel (e.g. 'MXZ') of a station, None if station is not found."""
+        if (channels := self.channels.get(station)) is None:
+            return None
+
+        if self.consolidated:
+            # channels of a station are stored in adjacent rows
+            rows = [self.rows[key] for _, key in channels]
+            start, stop = min(rows), max(rows) + 1
+
+            if stop - start == len(rows):
+                data = self.group[start: stop]
+                return {cha: data[self.rows[key] - start] for cha, key in channels}
+
+        return {cha: self[key] for cha, key in channels}
+
+    def columns(self, idx: List[int]) -> Dict[str, np.ndarray]:
+        """Frequency components at given indices (in increasing order) of each key, only the selected columns are read."""
+        if self.consolidated:
+            data = self.group[:, idx] if len(idx) and len(self.rows) else np.zeros((len(self.rows), len(idx)), self.group.dtype)
+            return {key: data[row] for key, row in self.rows.items()}
+
+        return {key: self.group[key][idx] for key in self.group}
+
+    def parameters(self, key: str) -> Dict[str, Any]:
+        """Parameters of a station channel (e.g. df, fmin, fmax or processing parameters of Kernel._ft)."""
+        if self.consolidated:
+            params = dict(self.group.attrs)
+
+            if 'parameters' in self.file:
+                row = self.rows[key]
+
+                for name, vals in self.file['parameters'].items():
+                    params[name] = vals[row]
+
+            return params
+
+        return dict(self.group[key].attrs)
+
+    def matrix(self) -> np.ndarray:
+        """All frequency components as a (channels x frequencies) array (consolidated layout only),
+            memory mapped if the matrix is stored contiguously."""
+        if not self.consolidated:
+            raise TypeError(f'{self.src} is not in consolidated layout')
+
+        if self.group.chunks is None and (offset := self.group.id.get_offset()) is not None:
+            return np.memmap(self.src, self.group.dtype, 'r', offset, self.group.shape)
+
+        return self.group[()]
+
+    @property
+    def event(self):
+        """Event saved in the file (obspy Event)."""
+        from io import BytesIO
+        from obspy import read_events
+
+        return read_events(BytesIO(self.file['QuakeML'][()].tobytes()), format='quakeml')[0]
+
+
+def write_spectra(dst: str, spectra: Dict[str, np.ndarray], params: Dict[str, Dict[str, Any]],
+    quakeml: Optional[bytes] = None, dtype: Any = np.complex128, storage: Optional[str] = None):
+    """Save frequency components in consolidated layout (compressed and chunked by storage profile, see storage.py):
+        /spectra    complex matrix (channels x frequencies) with shared parameters as attributes
+        /keys       key of each row (<network>_<station>_<channel>), channels of a station are adjacent
+        /parameters parameters that differ between channels, one value per row
+        /QuakeML    event of the traces (optional)"""
+    import h5py
+    from .storage import dataset_options
+
+    keys = sorted(spectra)
+    shared = {}
+    varying = {}
+
+    if keys:
+        for name, val in params[keys[0]].items():
+            if all(np.array_equal(params[key].get(name), val) for key in keys):
+                shared[name] = val
+
+            else:
+                varying[name] = np.array([params[key].get(name) for key in keys])
+
+    matrix = np.array([spectra[key] for key in keys], dtype=dtype) if keys else np.zeros((0, 0), dtype=dtype)
+
+    with h5py.File(dst, 'w') as f:
+        data = f.create_dataset('spectra', data=matrix, **dataset_options(matrix.shape, storage))
+        data.attrs.update(shared)
+        f.create_dataset('keys', data=np.array(keys, dtype='S'))
+
+        if varying:
+            group = f.create_group('parameters')
+
+            for name, vals in varying.items():
+                group.create_dataset(name, data=vals)
+
+        if quakeml is not None:
+            f.create_dataset('QuakeML', data=np.frombuffer(quakeml, dtype=np.uint8))
+
+
+def consolidate(src: str, dst: str, tag: str = 'FT', storage: Optional[str] = None):
+    """Convert ASDF auxiliary data to consolidated layout."""
+    with Spectra(src, tag) as sp:
+        keys = sp.keys()
+        quakeml = sp.file['QuakeML'][()].tobytes() if 'QuakeML' in sp.file else None
+
+        spectra = {key: sp[key] for key in keys}
+        dtype = np.result_type(*spectra.values()) if spectra else np.complex128
+
+        write_spectra(dst, spectra, {key: sp.parameters(key) for key in keys}, quakeml, dtype, storage)
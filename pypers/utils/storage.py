@@ -0,0 +1,107 @@
+from typing import Any, Dict, Optional, Tuple
+
+
+# options parsed from each storage profile
+_profiles: Dict[str, Dict[str, Any]] = {}
+
+
+def getprofile(profile: Optional[str] = None) -> Dict[str, Any]:
+    """HDF5 filter and chunk options of a storage profile (default to job.storage, uncompressed if not set).
+        A profile is a '+'-separated list of options, e.g. 'gzip-4+shuffle' or 'lzf+chunks=row':
+            none, lzf, gzip, gzip-<level>   compression filter (gzip defaults to level 4)
+            shuffle                         byte shuffle before compression
+            chunks=<policy>                 chunk shape of matrices, 'auto' (h5py default), 'row' (one row per chunk),
+                                            <n> (n rows per chunk) or 'contiguous' (not chunked, unless compressed)"""
+    if profile is None:
+        from pypers.core.config import getcfg
+
+        profile = getcfg('job', 'storage') or 'none'
+
+    if profile not in _profiles:
+        opts: Dict[str, Any] = {'compression': None, 'compression_opts': None, 'shuffle': False, 'chunks': None}
+
+        for token in profile.split('+'):
+            token = token.strip()
+
+            if token in ('', 'none'):
+                continue
+
+            if token == 'lzf':
+                opts['compression'] = 'lzf'
+
+            elif token == 'gzip' or token.startswith('gzip-'):
+                level = int(token[5:]) if token != 'gzip' else 4
+
+                if not 0 <= level <= 9:
+                    raise ValueError(f'invalid gzip level in storage profile {profile!r}')
+
+                opts['compression'] = 'gzip'
+                opts['compression_opts'] = level
+
+            elif token == 'shuffle':
+                opts['shuffle'] = True
+
+            elif token.startswith('chunks='):
+                policy = token[7:]
+
+                if policy not in ('auto', 'row', 'contiguous') and not policy.isdigit():
+                    raise ValueError(f'invalid chunk policy in storage profile {profile!r}')
+
+                opts['chunks'] = None if policy == 'contiguous' else policy
+
+            else:
+                raise ValueError(f'invalid option {token!r} in storage profile {profile!r}')
+
+        _profiles[profile] = opts
+
+    return _profiles[profile]
+
+
+def dataset_options(shape: Tuple[int, ...], profile: Optional[str] = None) -> Dict[str, Any]:
+    """Keyword arguments of h5py create_dataset() for a dataset of given shape."""
+    opts = getprofile(profile)
+    filtered = opts['compression'] is not None or opts['shuffle']
+    chunks = opts['chunks']
+
+    if 0 in shape or len(shape) == 0:
+        # empty and scalar datasets cannot be chunked
+        return {}
+
+    if len(shape) > 1 and (chunks == 'row' or (chunks and chunks.isdigit())):
+        nrows = 1 if chunks == 'row' else max(min(int(chunks), shape[0]), 1)
+        chunks = (nrows,) + tuple(shape[1:])
+
+    elif chunks is not None or filtered:
+        # row policies of 1D datasets fall back to h5py default
+        chunks = True
+
+    kwargs: Dict[str, Any] = {'chunks': chunks}
+
+    if opts['compression']:
+        kwargs['compression'] = opts['compression']
+        kwargs['compression_opts'] = opts['compression_opts']
+
+    if opts['shuffle']:
+        kwargs['shuffle'] = True
+
+    return kwargs
+
+
+def asdf_options(profile: Optional[str] = None) -> Dict[str, Any]:
+    """Keyword arguments of pyasdf ASDFDataSet() (pyasdf chooses chunk shapes of compressed traces itself),
+        empty if profile and job.storage are not set so that the default compression of the writer is kept."""
+    if profile is None:
+        from pypers.core.config import getcfg
+
+        if not (profile := getcfg('job', 'storage')):
+            return {}
+
+    opts = getprofile(profile)
+
+    if opts['compression'] == 'gzip':
+        compression = f'gzip-{opts["compression_opts"]}'
+
+    else:
+        compression = opts['compression']
+
+    return {'compression': compression, 'shuffle': opts['shuffle']}
@@ -0,0 +1,10 @@
+from sys import argv
+
+from pypers.core.config import getcfg
+from pypers.core.runtime.trace import load, summarize, trace_file
+
+
+if __name__ == '__main__':
+    # print critical path and node utilization of a trace file
+    srcs = [arg for arg in argv[1:] if not arg.startswith('-')]
+    print(summarize(load(srcs[0] if srcs else trace_file), getcfg('job', 'nnodes')))
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from pypers.core.config import Config
+from pypers.core.runtime.misc import cache
+from pypers.core.runtime import executor, console, status, trace
+
+
+@pytest.fixture
+def config():
+    """Set job config of the local cluster, global state is reset after the test."""
+    def setconfig(**job):
+        cache['config'] = Config({'job': {'name': 'test', 'cluster': 'local', 'nnodes': 1, **job}})
+
+    setconfig()
+
+    yield setconfig
+
+    cache.clear()
+    executor.reset()
+    console.reset()
+    status.reset()
+    trace.reset()
+
+
+@pytest.fixture
+def jobdir(tmp_path, monkeypatch, config):
+    """Run in a temporary job directory, MPI processes started in the directory can import pypers."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pythonpath = os.environ.get('PYTHONPATH')
+
+    monkeypatch.setenv('PYTHONPATH', root + (os.pathsep + pythonpath if pythonpath else ''))
+    monkeypatch.chdir(tmp_path)
+
+    return tmp_path
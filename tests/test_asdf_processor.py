@@ -0,0 +1,59 @@
+from io import StringIO
+
+import pytest
+
+pytest.importorskip('asdfy')
+pytest.importorskip('mpi4py')
+pyasdf = pytest.importorskip('pyasdf')
+h5py = pytest.importorskip('h5py')
+np = pytest.importorskip('numpy')
+
+from obspy import Trace
+
+from pypers.utils import asdf_processor
+from pypers.utils.asdf_processor import Processor
+
+
+@pytest.fixture
+def src(tmp_path):
+    """ASDF file with three components of a station."""
+    src = str(tmp_path / 'synthetic.h5')
+
+    with pyasdf.ASDFDataSet(src, mode='w', mpi=False, compression=None) as ds:
+        for i, cmp in enumerate('ENZ'):
+            stats = {'network': 'II', 'station': 'AAK', 'channel': f'MX{cmp}', 'delta': 1.0}
+            ds.add_waveforms(Trace(np.full(8, i, dtype='f4'), stats), 'synthetic')
+
+    return src
+
+
+def double(acc):
+    return {cha: (data * 2, {'npts': acc.stats[cha]['npts']}) for cha, data in acc.array.items()}
+
+
+def test_array(src, tmp_path):
+    """Waveforms are read as arrays and output is written with the storage profile."""
+    dst = str(tmp_path / 'proc.h5')
+    Processor(src, dst, double, 'array', output_tag='FT', accessor=True, storage='gzip-4').run()
+
+    with pyasdf.ASDFDataSet(dst, mode='r', mpi=False) as ds:
+        aux = ds.auxiliary_data['FT']
+
+        assert sorted(aux.list()) == ['II_AAK_MXE', 'II_AAK_MXN', 'II_AAK_MXZ']
+        assert aux['II_AAK_MXZ'].data[0] == 4 and aux['II_AAK_MXZ'].parameters['npts'] == 8
+
+    with h5py.File(dst, 'r') as f:
+        assert f['AuxiliaryData/FT/II_AAK_MXZ'].compression == 'gzip'
+
+
+def test_write_error(src, tmp_path, monkeypatch):
+    """Data that fails to be written is printed before the error is reported."""
+    errors = []
+    monkeypatch.setattr(asdf_processor, 'stderr', out := StringIO())
+    invalid = lambda acc: {'bad path': (np.zeros(4), {})}
+
+    Processor(src, str(tmp_path / 'proc.h5'), invalid, 'array', output_tag='FT', accessor=True,
+        onerror=errors.append, storage='gzip-4').run()
+
+    assert len(errors) == 1
+    assert 'II_AAK_bad path' in out.getvalue()
@@ -0,0 +1,17 @@
+import pickle
+
+from pypers.core.config import Config
+from pypers.core.runtime.misc import cache
+from pypers.fwi.catalog import catalogdir
+
+
+def test_catalogdir(config, tmp_path):
+    """Location of catalog directory is read from config when used."""
+    cache['config'] = Config({'path': {'catalog': str(tmp_path)}})
+
+    assert catalogdir.rel('events') == str(tmp_path / 'events')
+    assert catalogdir.abs() == str(tmp_path) and catalogdir == catalogdir.subdir('.')
+    assert pickle.loads(pickle.dumps(catalogdir)).abs() == str(tmp_path)
+
+    cache['config'] = Config({'path': {'catalog': str(tmp_path / 'other')}})
+    assert catalogdir.abs() == str(tmp_path / 'other')
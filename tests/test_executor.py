@@ -0,0 +1,184 @@
+import asyncio
+from functools import partial
+from time import time
+
+import pytest
+
+from pypers import Directory
+from pypers.core.runtime import executor
+from pypers.core.runtime.executor import Request
+
+
+def occupy(nprocs: int, cpus_per_proc: int = 1, gpus_per_proc: int = 0) -> asyncio.Lock:
+    """Reserve resource for a fake running task."""
+    lock = asyncio.Lock()
+    assert executor._dispatch(lock, Request(nprocs, cpus_per_proc, gpus_per_proc, 1, 0.0, time()))
+
+    return lock
+
+
+def test_order_aging(config):
+    config(max_wait=1)
+    now = time()
+
+    low = (asyncio.Lock(), Request(1, 1, 0, 1, 0.0, now))
+    high = (asyncio.Lock(), Request(1, 1, 0, 1, 1.0, now))
+    aged = (asyncio.Lock(), Request(1, 1, 0, 1, -1.0, now - 120))
+    older = (asyncio.Lock(), Request(1, 1, 0, 1, -1.0, now - 180))
+
+    assert sorted([low, aged, high, older], key=executor._order, reverse=True) == [older, aged, high, low]
+
+
+def test_oversized_request_with_aged_pending(config, jobdir):
+    """Oversized request fails immediately instead of being queued behind an aged request."""
+    config(nnodes=1, cpus_per_node=4, max_wait=1)
+
+    async def main():
+        executor._init_nodes()
+        running = occupy(4)
+
+        # aged request waiting for the running task
+        aged = asyncio.Lock()
+        await aged.acquire()
+        executor._pending[aged] = Request(4, 1, 0, 1, 0.0, time() - 120)
+
+        with pytest.raises(RuntimeError, match='Insufficient nodes'):
+            await asyncio.wait_for(executor.mpiexec(Directory(), 'true', 8, 1, 0, None), 5)
+
+        with pytest.raises(RuntimeError, match='Insufficient resource per node'):
+            await asyncio.wait_for(executor.mpiexec(Directory(), 'true', 1, 5, 0, None), 5)
+
+        # the aged request is dispatched when the running task finishes
+        executor._release(running)
+        executor._schedule()
+        assert aged not in executor._pending and aged in executor._running
+
+    asyncio.run(main())
+
+
+def test_schedule_error(config, jobdir, monkeypatch):
+    """Error of a pending request is raised in its own task, other pending requests are dispatched."""
+    config(nnodes=1, cpus_per_node=2)
+
+    async def main():
+        executor._init_nodes()
+        running = occupy(2)
+
+        bad = asyncio.create_task(executor.mpiexec(Directory(), 'true', 1, 1, 0, None, priority=1.0))
+        good = asyncio.create_task(executor.mpiexec(Directory(), 'true', 1, 1, 0, None, priority=0.0))
+        await asyncio.sleep(0.1)
+        assert len(executor._pending) == 2
+
+        lock = next(lock for lock, req in executor._pending.items() if req.priority == 1.0)
+        dispatch = executor._dispatch
+
+        def faulty(l, req):
+            if l is lock:
+                raise RuntimeError('placement failed')
+
+            return dispatch(l, req)
+
+        monkeypatch.setattr(executor, '_dispatch', faulty)
+        executor._release(running)
+        executor._schedule()
+
+        with pytest.raises(RuntimeError, match='placement failed'):
+            await asyncio.wait_for(bad, 5)
+
+        await asyncio.wait_for(good, 10)
+        assert len(executor._pending) == 0 and len(executor._running) == 0
+
+    asyncio.run(main())
+
+
+def test_capacity(config):
+    config(cpus_per_node=42, gpus_per_node=6)
+
+    assert executor._capacity(4, 0) == 10
+    assert executor._capacity(1, 1) == 6
+    assert executor._capacity(7, 2) == 3
+    assert executor._capacity(0, 0) is None
+    assert executor._capacity(43, 0) == 0
+
+
+def test_place_packing(config):
+    config(nnodes=2, cpus_per_node=4, gpus_per_node=2)
+    executor._init_nodes()
+
+    # GPU task takes the GPUs of one node
+    gpu = occupy(2, 1, 1)
+    node = executor._running[gpu][0][0]
+
+    # CPU-only task is packed onto the node whose GPUs are busy
+    cpu = occupy(2)
+    assert {i for i, _, _ in executor._running[cpu]} == {node}
+
+    executor._release(gpu)
+    executor._release(cpu)
+    assert executor._free == [({0, 1, 2, 3}, {0, 1})] * 2
+
+
+def test_place_across_nodes(config):
+    config(nnodes=3, cpus_per_node=4)
+    executor._init_nodes()
+
+    lock = occupy(5, 2)
+    assert sorted(i for i, _, _ in executor._running[lock]) == [0, 0, 1, 1, 2]
+    assert executor._place(Request(1, 4, 0, 1, 0.0, time())) is None
+
+
+def test_unplaceable_request(config, jobdir):
+    """105 processes with 4 CPUs each need 11 nodes of 42 cores (10 processes per node), not 10."""
+    config(nnodes=10, cpus_per_node=42)
+
+    async def main():
+        await executor.mpiexec(Directory(), 'true', 105, 4, 0, None)
+
+    with pytest.raises(RuntimeError, match='Insufficient nodes'):
+        asyncio.run(asyncio.wait_for(main(), 5))
+
+    assert len(executor._pending) == 0
+
+
+def test_function_files(config, jobdir):
+    """Each call of the same function object writes its own launch files, which are removed after success."""
+    config(nnodes=2, cpus_per_node=1)
+    d = Directory()
+    func = partial(d.write, 'done', 'output.txt', 'a')
+
+    async def main():
+        await asyncio.gather(*(executor.mpiexec(d, func, 1, 1, 0, None) for _ in range(2)))
+
+        with pytest.raises(RuntimeError, match='missing.txt'):
+            await executor.mpiexec(d, partial(d.read, 'missing.txt'), 1, 1, 0, None)
+
+    asyncio.run(asyncio.wait_for(main(), 60))
+
+    assert d.read('output.txt') == 'donedone'
+    assert d.read('mpiexec.out').count('payload:') == 2
+
+    # files of the failed call are kept
+    assert sorted(f.split('.')[-1] for f in d.ls(grep='mpiexec.*.*')) == ['error', 'out', 'pickle', 'start']
+
+
+def test_bundle(config, jobdir):
+    config(nnodes=1, cpus_per_node=2, bundle_window=0.1)
+    d = Directory()
+
+    async def main():
+        # three functions are launched as two bundles of two and one processes
+        return await asyncio.gather(
+            *(d.subdir(f'f{i}').mpiexec(partial(d.write, str(i), f'f{i}/out.txt'), bundle=True) for i in range(3)),
+            d.subdir('err').mpiexec(partial(d.read, 'missing.txt'), bundle=True),
+            return_exceptions=True)
+
+    results = asyncio.run(asyncio.wait_for(main(), 60))
+
+    assert results[:3] == [None] * 3
+    assert isinstance(results[3], RuntimeError) and 'missing.txt' in str(results[3])
+
+    for i in range(3):
+        assert d.read(f'f{i}/out.txt') == str(i)
+        assert d.ls(f'f{i}', 'mpiexec.*.*') == []
+
+    assert len(d.ls('err', 'mpiexec.*.error')) == 1 and d.ls('bundles', 'mpiexec.*.*') == []
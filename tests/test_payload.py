@@ -0,0 +1,96 @@
+import pickle
+from io import BytesIO
+from typing import Optional
+
+import pytest
+
+from pypers import Workspace, Task, field
+from pypers.core.runtime import payload
+
+
+class Solver(Workspace):
+    # field resolved from parent workspace
+    duration: Optional[float] = field()
+
+    # field with default value
+    nprocs: int = field(4)
+
+
+def detach(obj):
+    f = BytesIO()
+    payload.dump(f, obj)
+    f.seek(0)
+
+    return pickle.load(f)
+
+
+def test_detached_workspace(config):
+    ws = Workspace('job', {'duration': 30.0})
+    ws.add(solver := Solver('solver'))
+    solver.add(Task(print, 'task'))
+
+    copy = detach(solver)
+
+    assert type(copy) is Solver
+    assert copy.rel() == solver.rel()
+    assert copy.duration == 30.0 and copy.nprocs == 4
+    assert len(copy) == 0 and len(copy.parent) == 0
+
+    with pytest.raises(RuntimeError):
+        copy['duration'] = 60.0
+
+
+class Kernel(Workspace):
+    """Workspace subclass with instance attributes and a property walking parent workspaces."""
+    def __init__(self, cwd: str):
+        super().__init__(cwd)
+        self.nevents = 2
+
+    @property
+    def depth(self) -> int:
+        """Number of parent kernel workspaces."""
+        return self.parent.depth + 1 if isinstance(self.parent, Kernel) else 0
+
+
+def test_detached_state(config):
+    root = Workspace('.', {'misfit': 'root', 'nprocs': 1})
+    root.add(ws := Kernel('kernel'))
+    ws.add(child := Kernel('child'))
+    ws.add(Workspace('sibling'))
+    root['misfit'] = 'assigned'
+    child['step'] = 0.5
+
+    copy = detach(child)
+
+    # keys of self and parent workspaces, nearest first
+    assert copy['misfit'] == 'assigned' and copy['step'] == 0.5 and copy['nprocs'] == 1
+    assert copy['missing'] is None
+
+    # instance attributes, parent workspaces without child nodes
+    assert copy.nevents == 2 and copy.depth == 1
+    assert copy.rel() == 'kernel/child' and copy.level == 2
+    assert len(copy.parent) == 0 and copy.parent.parent.parent is None
+
+
+def test_detached_task(config):
+    assert detach(Task(print, 'task')) is None
+
+
+def test_payload_size(config):
+    """Payload of a bound method does not grow with the nodes and state outside of its workspace and parents."""
+    root = Workspace('.', {'nprocs': 1})
+    root.add(ws := Workspace('solver'))
+
+    def size():
+        f = BytesIO()
+
+        return payload.dump(f, ws.rel)
+
+    before = size()
+
+    for i in range(100):
+        root.add(sibling := Workspace(f'sibling_{i}', {'data': list(range(1000))}))
+        sibling.add(Task(print, 'task'))
+        ws.add(Workspace(f'child_{i}', {'data': list(range(1000))}))
+
+    assert size() == before
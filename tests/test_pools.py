@@ -0,0 +1,45 @@
+import asyncio
+from functools import partial
+
+import pytest
+
+from pypers import Directory
+from pypers.core.runtime import pools
+from pypers.core.runtime.misc import current_task
+
+
+def test_thread_context(config):
+    """Functions called in a thread see the context variables of the caller."""
+    seen = []
+
+    async def main():
+        current_task.set('task') # type: ignore
+        await pools.call(lambda: seen.append(current_task.get()), 'thread')
+
+    asyncio.run(main())
+    assert seen == ['task']
+
+
+def test_thread_result(config):
+    """Results of functions called in a thread are returned, including coroutines."""
+    async def square(x):
+        return x * x
+
+    assert asyncio.run(pools.call(partial(pow, 2, 10), 'thread')) == 1024
+    assert asyncio.run(pools.call(partial(square, 3), 'thread')) == 9
+
+
+def test_process(config, jobdir):
+    config(process_workers=1)
+    d = Directory()
+
+    async def main():
+        await pools.call(partial(d.write, 'done', 'out.txt'), 'process')
+
+    asyncio.run(main())
+    assert d.read('out.txt') == 'done'
+
+
+def test_unknown_mode(config):
+    with pytest.raises(ValueError):
+        asyncio.run(pools.call(print, 'cluster')) # type: ignore
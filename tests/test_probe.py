@@ -0,0 +1,126 @@
+import asyncio
+from threading import Event
+from time import time
+
+from pypers import Directory, Workspace, Task, ResubmitJob, cache
+from pypers.core.runtime import console
+from pypers.utils.specfem import LogTail, tail, probe_solver
+
+
+def test_log_tail_per_task(config, jobdir):
+    d = Directory()
+    d.write('We have done   50.0 % of that\n', 'OUTPUT_FILES/output_solver.txt')
+    seen = []
+
+    async def solve():
+        # probe while the task is running
+        seen.append(task.probe())
+        d.write('End of the simulation\n', 'OUTPUT_FILES/output_solver.txt', 'a')
+        seen.append(task.probe())
+        seen.append(len(task._tails))
+
+    # task is not saved to job.pickle
+    cache['job'] = Workspace()
+    task = Task(solve, 'solver', lambda: probe_solver(d))
+    asyncio.run(task.execute())
+
+    assert seen == [0.5, 1.0, 1]
+
+    # log readers are discarded when the task finishes
+    assert task._tails is None
+
+    # readers are not shared outside of tasks
+    assert tail(d.abs('OUTPUT_FILES/output_solver.txt')) is not tail(d.abs('OUTPUT_FILES/output_solver.txt'))
+
+
+def test_log_tail_threads(jobdir):
+    """Lines are parsed once when a reader is shared by threads."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    d = Directory()
+    d.write('line\n' * 1000, 'output.txt')
+    t = LogTail(d.abs('output.txt'))
+
+    def count(line: str, state: dict):
+        state['n'] = state.get('n', 0) + 1
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: t.parse(count), range(8)))
+
+    assert t.parse(count) == {'n': 1000}
+
+
+def test_serialized_probe(config):
+    release = Event()
+    calls = []
+
+    def prober():
+        calls.append(None)
+        release.wait(5)
+        return 0.5
+
+    task = Task(print, 'solver', prober)
+    task._transition(time(), None, None)
+
+    async def main():
+        console.monitor(task)
+        console._progress[task] = 0.25
+
+        # wait until the console loop probes the task in its thread pool
+        while task not in console._probing:
+            await asyncio.sleep(0.05)
+
+        # latest output is returned while the task is being probed
+        assert task.probe() == 0.25
+
+        release.set()
+
+        while task in console._probing:
+            await asyncio.sleep(0.05)
+
+        assert console.progress(task) == 0.5 and len(calls) == 1
+
+        task._transition(task.starttime, time(), None)
+        console.unlink(task)
+
+    asyncio.run(main())
+
+
+def test_counts(config):
+    for exc in (None, RuntimeError('failed'), ResubmitJob('paused')):
+        console._monitoring.append(task := Task(print))
+        task._transition(time(), None if exc else time(), exc)
+        console.unlink(task)
+
+    assert (console._ndone, console._nfailed, console._npaused) == (1, 1, 1)
+
+    console.reset()
+    assert (console._ndone, console._nfailed, console._npaused) == (0, 0, 0)
+
+
+def test_status_update(config, jobdir):
+    from pypers.core.runtime import status
+
+    ws = Workspace()
+    ws.add(sub := Workspace('sub'))
+    sub.add(task := Task(print, 'task'))
+    status.write(ws)
+
+    assert status.read()['nodes'][0]['nodes'][0]['state'] is None
+
+    # task transitions update the maintained snapshot without rebuilding it
+    tree = status.current(ws)
+    task._transition(time(), None, None)
+    assert status.current(ws) is tree and status._dirty
+
+    status.write(ws)
+    entry = status.read()
+    assert entry['state'] == entry['nodes'][0]['state'] == entry['nodes'][0]['nodes'][0]['state'] == 'running'
+
+    task._transition(task.starttime, time(), None)
+    status.write(ws)
+    assert status.read()['nodes'][0]['nodes'][0]['state'] == 'done'
+
+    # snapshot is rebuilt when nodes are added
+    sub.add(Task(print, 'task2'))
+    assert status.current(ws) is not tree and len(status.current(ws)['nodes'][0]['nodes']) == 2
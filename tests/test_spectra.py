@@ -0,0 +1,40 @@
+import pytest
+
+h5py = pytest.importorskip('h5py')
+np = pytest.importorskip('numpy')
+
+from pypers.utils.spectra import Spectra, write_spectra
+
+
+@pytest.fixture
+def spectra():
+    return {f'II_AAK_MX{cmp}': np.arange(8, dtype=np.complex64) * (i + 1) for i, cmp in enumerate('ENZ')}
+
+
+@pytest.fixture(params=['consolidated', 'asdf'])
+def src(request, tmp_path, spectra):
+    """Frequency components in consolidated or ASDF layout."""
+    src = str(tmp_path / 'observed.ft.h5')
+
+    if request.param == 'consolidated':
+        write_spectra(src, spectra, dict.fromkeys(spectra, {'df': 0.1}), dtype=np.complex64)
+
+    else:
+        with h5py.File(src, 'w') as f:
+            for key, data in spectra.items():
+                f.create_dataset(f'AuxiliaryData/FT/{key}', data=data).attrs['df'] = 0.1
+
+    return src
+
+
+def test_columns(src, spectra):
+    with Spectra(src) as sp:
+        cols = sp.columns([1, 5])
+
+        assert sorted(cols) == sorted(spectra)
+
+        for key, data in cols.items():
+            assert data.dtype == np.complex64
+            assert np.array_equal(data, spectra[key][[1, 5]])
+
+        assert all(len(data) == 0 for data in sp.columns([]).values())
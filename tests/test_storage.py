@@ -0,0 +1,28 @@
+import pytest
+
+from pypers.utils import storage
+
+
+@pytest.fixture(autouse=True)
+def profiles():
+    yield
+    storage._profiles.clear()
+
+
+def test_default(config):
+    """Without a profile the default compression of the writer is kept."""
+    assert storage.asdf_options() == {}
+    assert storage.dataset_options((4, 8)) == {'chunks': None}
+
+
+def test_profile(config):
+    config(storage='gzip-4+shuffle+chunks=row')
+
+    assert storage.asdf_options() == {'compression': 'gzip-4', 'shuffle': True}
+    assert storage.asdf_options('none') == {'compression': None, 'shuffle': False}
+    assert storage.dataset_options((4, 8)) == {'chunks': (1, 8), 'compression': 'gzip', 'compression_opts': 4, 'shuffle': True}
+
+
+def test_invalid_profile(config):
+    with pytest.raises(ValueError):
+        storage.getprofile('gzip-10')
@@ -0,0 +1,24 @@
+import asyncio
+
+from pypers.core.runtime import trace
+
+
+def test_thread_ids(config, jobdir):
+    """Thread ids of finished asyncio tasks are released and reused."""
+    config(trace=True)
+
+    async def span():
+        trace.complete('span', 'task', trace.now())
+        await asyncio.sleep(0)
+
+    async def main():
+        await span()
+        await asyncio.gather(span(), span())
+        assert len(trace._tids) == 1 and sorted(trace._free) == [1, 2]
+
+        await asyncio.gather(span(), span(), span())
+
+    asyncio.run(main())
+
+    tids = [e['tid'] for e in trace.load()]
+    assert tids[0] == 0 and sorted(tids[1:3]) == [1, 2] and sorted(tids[3:]) == [1, 2, 3]
@@ -0,0 +1,33 @@
+import pytest
+
+h5py = pytest.importorskip('h5py')
+np = pytest.importorskip('numpy')
+
+from pypers.utils.asdf import Waveforms
+
+
+@pytest.fixture
+def src(tmp_path):
+    """ASDF-like file with a vertical channel at location 00 and three components at location 10."""
+    src = str(tmp_path / 'synthetic.h5')
+
+    with h5py.File(src, 'w') as f:
+        for i, code in enumerate(('II.AAK.00.MXZ', 'II.AAK.10.MXE', 'II.AAK.10.MXN', 'II.AAK.10.MXZ')):
+            ds = f.create_dataset(f'Waveforms/II.AAK/{code}__2000__2001__synthetic', data=np.full(4, i, dtype='f4'))
+            ds.attrs['sampling_rate'] = 1.0
+            ds.attrs['starttime'] = 0
+
+    return src
+
+
+def test_locations(src):
+    with Waveforms(src) as wav:
+        assert wav.locations('II.AAK') == ['00', '10']
+
+        # first location of each channel
+        assert wav.station('II.AAK')['MXZ'][0] == 0
+
+        # channels of a single location
+        assert sorted(wav.channels('II.AAK', location='00')) == ['MXZ']
+        assert {cha: data[0] for cha, data in wav.station('II.AAK', location='10').items()} == {'MXE': 1, 'MXN': 2, 'MXZ': 3}
+        assert wav.stats('II.AAK', 'synthetic', '10')['MXZ']['npts'] == 4
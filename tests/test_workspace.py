@@ -0,0 +1,58 @@
+from pypers import Workspace
+
+
+def tree():
+    root = Workspace('.', {'duration': 30.0})
+    root.add(a := Workspace('a'))
+    root.add(b := Workspace('b'))
+    a.add(c := Workspace('c'))
+
+    return root, a, b, c
+
+
+def test_lookup(config):
+    root, a, b, c = tree()
+
+    assert c['duration'] == 30.0
+    assert c['missing'] is None and 'missing' not in c
+
+    a['duration'] = 60.0
+    assert c['duration'] == 60.0 and b['duration'] == 30.0
+
+    del a['duration']
+    assert c['duration'] == 30.0
+
+
+def test_invalidate_subtree(config):
+    root, a, b, c = tree()
+
+    for ws in (a, b, c):
+        assert ws['duration'] == 30.0
+
+    # only the memo of the changed workspace and its descendants is discarded
+    a['duration'] = 60.0
+    assert a._resolved_gen == c._resolved_gen == -1
+    assert b._resolved_gen != -1
+
+
+def test_clear_invalidates(jobdir):
+    root, a, b, c = tree()
+
+    assert c['duration'] == 30.0
+    a.clear(False)
+    assert c['duration'] is None
+
+    b.add(c)
+    assert c['duration'] == 30.0
+
+
+def test_truncate(config):
+    root, a, b, c = tree()
+    root.add(print)
+    a.add(print)
+
+    assert root.remaining == 2
+
+    root.truncate(1)
+    assert list(root) == [a] and b.parent is None
+    assert root.remaining == 1 and b['duration'] is None